@@ -0,0 +1,358 @@
+"""Compact Array-backed Transaction Graph Store
+
+Replaces NetworkX dict-of-dicts (hundreds of bytes per edge) in the
+graph-engine hot paths with flat arrays:
+- `NodeIdMap` interns external ids (e.g. "acct:A1") to dense int32 ids through
+  a sorted 64-bit hash table and keeps a node type code per node. Hashes are
+  kind-aware (1 and "1" are different keys, as in a dict) and every hash hit
+  is checked against the stored key; keys whose hash is already taken live in
+  a small overflow dict
+- `CompactGraph` stores edges as COO columns (src, dst int32; etype int8;
+  timestamp int64; amount float32, ~21 bytes/edge) with amortized bulk append,
+  and builds CSR adjacency on demand (cached until the next append)
+
+Conversion to/from NetworkX is kept for code that still needs it, and
+`save` / `load` write one `.npy` per column plus `meta.json` (memory-mapped on load).
+"""
+import json
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+NODE_TYPES = ['account', 'merchant', 'device']
+EDGE_TYPES = ['purchase', 'uses', 'transfers']
+
+# Per-kind salts so an int key never shares a hash with its string form
+_INT_SALT = np.uint64(0x9E3779B97F4A7C15)
+_OTHER_SALT = np.uint64(0xC2B2AE3D27D4EB4F)
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _grow(arr: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(arr):
+        return arr
+    grown = np.empty(max(size, 2 * len(arr), 1024), dtype=arr.dtype)
+    grown[:len(arr)] = arr
+    return grown
+
+
+class _Vocab:
+    """Small string <-> int8 code table (node types, edge types)."""
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.codes = {n: i for i, n in enumerate(self.names)}
+
+    def code(self, name) -> int:
+        c = self.codes.get(name)
+        if c is None:
+            if len(self.names) >= 127:
+                raise ValueError('Too many distinct types for an int8 code')
+            c = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+    def encode(self, values) -> np.ndarray:
+        if np.isscalar(values) or values is None:
+            return np.int8(-1 if values is None else self.code(values))
+        uniq, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        return np.array([self.code(u) for u in uniq], dtype=np.int8)[inverse]
+
+
+def _is_int(key) -> bool:
+    # Bools and integral floats hash as ints, matching dict semantics (True == 1 == 1.0)
+    if isinstance(key, (float, np.floating)):
+        return bool(np.isfinite(key)) and float(key).is_integer() and _INT64_MIN <= key < 2.0 ** 63
+    return isinstance(key, (int, np.integer, np.bool_)) and _INT64_MIN <= key <= _INT64_MAX
+
+
+class NodeIdMap:
+    """Interns keys to dense ids in first-seen order via a sorted table of 64-bit
+    key hashes (pd.util.hash_array), so bulk lookups stay vectorized."""
+
+    def __init__(self, node_types=NODE_TYPES):
+        self.types = _Vocab(node_types)
+        self._hashes = np.empty(0, dtype=np.uint64)   # sorted
+        self._hash_ids = np.empty(0, dtype=np.int64)  # node id of each sorted hash
+        self._overflow = {}                           # key -> id for keys whose hash was taken
+        self._names = np.empty(0, dtype=object)
+        self._ntype = np.empty(0, dtype=np.int8)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    @staticmethod
+    def _hash(keys) -> np.ndarray:
+        """Kind-aware hashes: strings by value, int64-range ints as integers (salted),
+        anything else by type name and repr (salted), so equal hashes imply the same kind."""
+        keys = np.asarray(keys, dtype=object)
+        kind = pd.api.types.infer_dtype(keys, skipna=False) if len(keys) else 'empty'
+        # Inputs are already distinct, so skip hash_array's internal factorize
+        if kind == 'string':
+            return pd.util.hash_array(keys, categorize=False)
+        out = np.empty(len(keys), dtype=np.uint64)
+        is_str = np.fromiter((isinstance(k, str) for k in keys), dtype=bool, count=len(keys))
+        is_int = np.fromiter((_is_int(k) for k in keys), dtype=bool, count=len(keys))
+        other = ~(is_str | is_int)
+        if is_str.any():
+            out[is_str] = pd.util.hash_array(keys[is_str], categorize=False)
+        if is_int.any():
+            ints = np.array(keys[is_int].tolist(), dtype=np.int64)
+            out[is_int] = pd.util.hash_array(ints, categorize=False) ^ _INT_SALT
+        if other.any():
+            tagged = np.array([f'{type(k).__name__}:{k!r}' for k in keys[other]], dtype=object)
+            out[other] = pd.util.hash_array(tagged, categorize=False) ^ _OTHER_SALT
+        return out
+
+    def _lookup(self, hashes):
+        ids = np.full(len(hashes), -1, dtype=np.int64)
+        if len(self._hashes):
+            # Sorted probes keep searchsorted cache-friendly on large tables
+            order = np.argsort(hashes)
+            probe = hashes[order]
+            pos = np.minimum(np.searchsorted(self._hashes, probe), len(self._hashes) - 1)
+            known = self._hashes[pos] == probe
+            ids[order[known]] = self._hash_ids[pos[known]]
+        return ids
+
+    def _resolve(self, keys, hashes):
+        """Ids of distinct `keys` (-1 if unseen); a hash hit only counts if the stored key matches."""
+        ids = self._lookup(hashes)
+        hit = np.flatnonzero(ids >= 0)
+        if len(hit):
+            stored = self._names[ids[hit]]
+            clash = hit[np.fromiter((a != b for a, b in zip(stored.tolist(), keys[hit].tolist())),
+                                    dtype=bool, count=len(hit))]
+            for i in clash.tolist():
+                ids[i] = self._overflow.get(keys[i], -1)
+        return ids
+
+    def get(self, key, default=None):
+        keys = np.empty(1, dtype=object)
+        keys[0] = key
+        idx = int(self._resolve(keys, self._hash(keys))[0])
+        return default if idx < 0 else idx
+
+    def intern(self, keys, ntype=None, prefix='') -> np.ndarray:
+        """Return int32 ids for `keys`, adding unseen keys (in first-seen order).
+
+        `prefix` is prepended to each distinct key only (e.g. 'acct:' on a raw id column).
+        """
+        codes, uniques = pd.factorize(np.asarray(keys, dtype=object), sort=False)
+        if prefix:
+            uniques = np.array([prefix + str(k) for k in uniques.tolist()], dtype=object)
+        hashes = self._hash(uniques)
+        uniq_ids = self._resolve(uniques, hashes)
+        new = np.flatnonzero(uniq_ids < 0)
+        if len(new):
+            start, end = self._n, self._n + len(new)
+            uniq_ids[new] = np.arange(start, end)
+            self._names = _grow(self._names, end)
+            self._names[start:end] = uniques[new]
+            self._ntype = _grow(self._ntype, end)
+            self._ntype[start:end] = -1
+            if ntype is not None:
+                type_codes = np.broadcast_to(self.types.encode(ntype), len(codes))
+                # First occurrence of each new unique carries its type
+                _, first = np.unique(codes, return_index=True)
+                self._ntype[start:end] = type_codes[first[new]]
+            # A new key whose hash is taken (by a stored key or an earlier new one) overflows
+            _, first = np.unique(hashes[new], return_index=True)
+            taken = np.ones(len(new), dtype=bool)
+            taken[first] = False
+            taken |= self._lookup(hashes[new]) >= 0
+            for i in new[taken].tolist():
+                self._overflow[uniques[i]] = int(uniq_ids[i])
+            table = new[~taken]
+            order = np.argsort(hashes[table])
+            pos = np.searchsorted(self._hashes, hashes[table][order])
+            self._hashes = np.insert(self._hashes, pos, hashes[table][order])
+            self._hash_ids = np.insert(self._hash_ids, pos, uniq_ids[table][order])
+            self._n = end
+        return uniq_ids[codes].astype(np.int32)
+
+    @property
+    def names(self) -> np.ndarray:
+        return self._names[:self._n]
+
+    @property
+    def ntype(self) -> np.ndarray:
+        return self._ntype[:self._n]
+
+    def type_of(self, node_id: int):
+        code = int(self._ntype[node_id])
+        return self.types.names[code] if code >= 0 else None
+
+
+class CompactGraph:
+    def __init__(self, directed=False, capacity=0):
+        self.directed = directed
+        self.nodes = NodeIdMap()
+        self.etypes = _Vocab(EDGE_TYPES)
+        self._src = np.empty(capacity, dtype=np.int32)
+        self._dst = np.empty(capacity, dtype=np.int32)
+        self._etype = np.empty(capacity, dtype=np.int8)
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._amount = np.empty(capacity, dtype=np.float32)
+        self._m = 0
+        self._csr = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return self._m
+
+    def add_edges(self, src, dst, etype=None, timestamp=None, amount=None, src_type=None, dst_type=None):
+        """Bulk append edges given external node keys; returns the new edge ids."""
+        return self.add_edges_by_id(self.nodes.intern(src, src_type), self.nodes.intern(dst, dst_type),
+                                    etype=etype, timestamp=timestamp, amount=amount)
+
+    def add_edges_by_id(self, src, dst, etype=None, timestamp=None, amount=None):
+        src = np.asarray(src, dtype=np.int32)
+        n = len(src)
+        start, end = self._m, self._m + n
+        for name in ('_src', '_dst', '_etype', '_ts', '_amount'):
+            setattr(self, name, _grow(getattr(self, name), end))
+        self._src[start:end] = src
+        self._dst[start:end] = dst
+        self._etype[start:end] = self.etypes.encode(etype)
+        self._ts[start:end] = 0 if timestamp is None else timestamp
+        self._amount[start:end] = np.nan if amount is None else amount
+        self._m = end
+        self._csr = None
+        return np.arange(start, end)
+
+    def coalesce(self):
+        """Drop parallel edges in place (unordered pairs when undirected), keeping the
+        last-added copy's attributes, as repeated nx.Graph.add_edge calls would."""
+        if self._m == 0:
+            return self
+        src, dst = self._src[:self._m].astype(np.int64), self._dst[:self._m].astype(np.int64)
+        if not self.directed:
+            src, dst = np.minimum(src, dst), np.maximum(src, dst)
+        key = src * max(self.num_nodes, 1) + dst
+        # One stable sort: each key's run starts at its first and ends at its last occurrence
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_key[1:] != sorted_key[:-1]]))
+        ends = np.concatenate([starts[1:], [len(order)]]) - 1
+        keep = order[ends][np.argsort(order[starts], kind='stable')]
+        for name in ('_src', '_dst', '_etype', '_ts', '_amount'):
+            col = getattr(self, name)
+            setattr(self, name, col[:self._m][keep].copy())
+        self._m = len(keep)
+        self._csr = None
+        return self
+
+    def coo(self):
+        """(src, dst, etype, timestamp, amount) views over the stored edges."""
+        m = self._m
+        return self._src[:m], self._dst[:m], self._etype[:m], self._ts[:m], self._amount[:m]
+
+    def csr(self):
+        """(indptr, indices, edge_ids); undirected graphs list every edge at both ends."""
+        if self._csr is None:
+            src, dst = self._src[:self._m], self._dst[:self._m]
+            eid = np.arange(self._m)
+            if not self.directed:
+                src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+                eid = np.concatenate([eid, eid])
+            order = np.argsort(src, kind='stable')
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=self.num_nodes), out=indptr[1:])
+            self._csr = (indptr, dst[order], eid[order])
+        return self._csr
+
+    def neighbors(self, node_id: int) -> np.ndarray:
+        indptr, indices, _ = self.csr()
+        return indices[indptr[node_id]:indptr[node_id + 1]]
+
+    def degree(self) -> np.ndarray:
+        indptr = self.csr()[0]
+        return np.diff(indptr)
+
+    def nbytes(self) -> int:
+        total = sum(getattr(self, n)[:self._m].nbytes for n in ('_src', '_dst', '_etype', '_ts', '_amount'))
+        if self._csr is not None:
+            total += sum(a.nbytes for a in self._csr)
+        return total + self.nodes.ntype.nbytes
+
+    def to_networkx(self) -> nx.Graph:
+        """Simple (Di)Graph with `ntype` node and `etype` edge attributes; parallel edges collapse."""
+        G = nx.DiGraph() if self.directed else nx.Graph()
+        names, ntype, tnames = self.nodes.names, self.nodes.ntype.tolist(), self.nodes.types.names
+        G.add_nodes_from((names[i], {'ntype': tnames[t]} if t >= 0 else {}) for i, t in enumerate(ntype))
+        src, dst, etype, ts, amount = self.coo()
+        enames = self.etypes.names
+        G.add_edges_from(
+            (names[s], names[d], {'etype': enames[e]} if e >= 0 else {})
+            for s, d, e in zip(src.tolist(), dst.tolist(), etype.tolist())
+        )
+        return G
+
+    @classmethod
+    def from_networkx(cls, G: nx.Graph):
+        graph = cls(directed=G.is_directed(), capacity=G.number_of_edges())
+        nodes = list(G.nodes())
+        graph.nodes.intern(nodes, [G.nodes[n].get('ntype', 'unknown') for n in nodes])
+        edges = list(G.edges(data=True))
+        if edges:
+            src, dst, data = zip(*edges)
+            graph.add_edges(list(src), list(dst),
+                            etype=[d.get('etype', 'unknown') for d in data],
+                            timestamp=[d.get('timestamp', 0) for d in data],
+                            amount=[d.get('amount', np.nan) for d in data])
+        return graph
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, arr in zip(('src', 'dst', 'etype', 'timestamp', 'amount'), self.coo()):
+            np.save(path / f'{name}.npy', arr)
+        np.save(path / 'ntype.npy', self.nodes.ntype)
+        # Keys round-trip as str or int (the `kind` column), so interning matches after load
+        names = self.nodes.names.tolist()
+        bad = next((k for k in names if not isinstance(k, str) and not _is_int(k)), None)
+        if bad is not None:
+            raise TypeError(f"Node keys must be str or int to save, got {type(bad).__name__}: {bad!r}")
+        is_str = [isinstance(k, str) for k in names]
+        pd.DataFrame({'node_id': np.arange(self.num_nodes),
+                      'name': [k if s else str(int(k)) for k, s in zip(names, is_str)],
+                      'kind': np.where(is_str, 'str', 'int')}).to_csv(path / 'nodes.csv', index=False)
+        with open(path / 'meta.json', 'w') as f:
+            json.dump({'directed': self.directed, 'num_nodes': self.num_nodes, 'num_edges': self.num_edges,
+                       'node_types': self.nodes.types.names, 'edge_types': self.etypes.names}, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        path = Path(path)
+        with open(path / 'meta.json') as f:
+            meta = json.load(f)
+        graph = cls(directed=meta['directed'])
+        graph.nodes.types = _Vocab(meta['node_types'])
+        graph.etypes = _Vocab(meta['edge_types'])
+        nodes = pd.read_csv(path / 'nodes.csv', dtype={'name': str, 'kind': str}, keep_default_na=False)
+        names = nodes['name'].to_numpy(dtype=object)
+        if 'kind' in nodes:  # older saves have no kind column and only str keys
+            ints = np.flatnonzero(nodes['kind'].to_numpy() == 'int')
+            names[ints] = [int(k) for k in names[ints].tolist()]
+        graph.nodes.intern(names)
+        graph.nodes._ntype = np.load(path / 'ntype.npy')
+        mode = 'c' if mmap else None
+        # Copy-on-write maps: appends reallocate, existing rows stay on disk
+        graph._src = np.load(path / 'src.npy', mmap_mode=mode)
+        graph._dst = np.load(path / 'dst.npy', mmap_mode=mode)
+        graph._etype = np.load(path / 'etype.npy', mmap_mode=mode)
+        graph._ts = np.load(path / 'timestamp.npy', mmap_mode=mode)
+        graph._amount = np.load(path / 'amount.npy', mmap_mode=mode)
+        graph._m = meta['num_edges']
+        return graph
@@ -1,32 +1,299 @@
 """Incremental Graph Updater
 
-Maintains an edge timestamp dictionary and prunes entries outside a rolling window.
-Use for real-time streaming updates.
+Maintains a rolling-window transaction graph for real-time streaming updates.
+Every transaction is an expiry entry: in-order events go to a FIFO queue
+(O(1) append / expire), late events to a min-heap keyed by timestamp, so each
+insert does amortized O(1) pruning work instead of scanning all edges.
+The live topology is a plain adjacency dict (node -> {neighbor: live
+transactions}, undirected) rather than a NetworkX graph, so an insert or
+expiry is a few dict operations; read it with `neighbors` / `degree` / `in`,
+or materialize it with `to_networkx()`. The edge is removed when its last
+transaction leaves the window, and a node is removed when its last edge does.
+
+Transactions are also appended to an interned, append-only event log. Every
+live transaction lies in the log range [oldest live in-order event, end), so
+`snapshot()` is O(1): it captures the log arrays, that range and the cutoff.
+Positions inside the range are never rewritten (growth and compaction
+allocate new arrays), so a snapshot stays consistent while ingestion continues.
+Compaction also re-interns the live nodes once at least half of the interned
+ids are dead, into a new id table, so the table tracks the window instead of
+every node ever seen.
+
+`temporal_degree` is updated per accepted event (O(1), lazily decayed); read
+it with `temporal_degree.score(node, now_ts)` instead of recomputing over edges.
+A node's score is discarded when it leaves the window (reads 0.0 after).
 """
+import heapq
+import threading
 import time
+from collections import deque
+
 import networkx as nx
+import numpy as np
+
+from features.temporal_graph_features import DECAY_HALF_LIFE_SEC, TemporalDegree
+
+
+class GraphSnapshot:
+    """Read-only view of the window at snapshot time.
+
+    Arrays are derived lazily on first access and cached on the snapshot.
+    Multi-edges appear once per live transaction in `src` / `dst` / `ts`.
+    """
+
+    def __init__(self, src, dst, ts, start, stop, cutoff, node_names, num_nodes, now_ts):
+        self._src, self._dst, self._ts = src, dst, ts
+        self._start, self._stop = start, stop
+        self.cutoff = cutoff
+        self.node_names = node_names  # append-only list; entries < num_nodes are stable
+        self.num_nodes = num_nodes
+        self.now_ts = now_ts
+        self._live = None
+        self._pairs = None
+        self._csr = None
+
+    def _events(self):
+        if self._live is None:
+            ts = self._ts[self._start:self._stop]
+            keep = ts >= self.cutoff
+            self._live = (self._src[self._start:self._stop][keep], self._dst[self._start:self._stop][keep], ts[keep])
+        return self._live
+
+    @property
+    def src(self):
+        return self._events()[0]
+
+    @property
+    def dst(self):
+        return self._events()[1]
+
+    @property
+    def ts(self):
+        return self._events()[2]
+
+    def num_transactions(self) -> int:
+        return len(self.ts)
+
+    def edge_pairs(self):
+        """Distinct (src, dst) pairs with live transaction count and latest timestamp."""
+        if self._pairs is None:
+            src, dst, ts = self._events()
+            key = src * self.num_nodes + dst
+            uniq, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+            latest = np.full(len(uniq), np.iinfo(np.int64).min)
+            np.maximum.at(latest, inverse, ts)
+            self._pairs = (uniq // self.num_nodes, uniq % self.num_nodes, counts, latest)
+        return self._pairs
+
+    def csr(self):
+        """Undirected (indptr, indices) adjacency over distinct pairs."""
+        if self._csr is None:
+            u, v, _, _ = self.edge_pairs()
+            a = np.concatenate([u, v])
+            b = np.concatenate([v, u])
+            order = np.argsort(a, kind='stable')
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(a, minlength=self.num_nodes))])
+            self._csr = (indptr, b[order])
+        return self._csr
+
+    def edge_timestamps(self) -> dict:
+        u, v, _, latest = self.edge_pairs()
+        names = self.node_names
+        return {(names[a], names[b]): int(t) for a, b, t in zip(u.tolist(), v.tolist(), latest.tolist())}
+
+    def to_compact(self):
+        """CompactGraph over live transactions (one edge per transaction, node ids preserved)."""
+        from compact_graph import CompactGraph
+        graph = CompactGraph(directed=False, capacity=self.num_transactions())
+        graph.nodes.intern(self.node_names[:self.num_nodes])
+        src, dst, ts = self._events()
+        graph.add_edges_by_id(src, dst, etype='purchase', timestamp=ts)
+        return graph
+
+    def to_networkx(self) -> nx.Graph:
+        """Materialize as a NetworkX graph (O(E); for code that still needs nx)."""
+        u, v, counts, _ = self.edge_pairs()
+        names = self.node_names
+        G = nx.Graph()
+        G.add_edges_from((names[a], names[b], {'count': c})
+                         for a, b, c in zip(u.tolist(), v.tolist(), counts.tolist()))
+        return G
+
 
 class IncrementalGraph:
-    def __init__(self, window_seconds: int = 3600):
-        self.G = nx.Graph()
-        self.edge_timestamps = {}
+    def __init__(self, window_seconds: int = 3600, log_capacity: int = 1 << 16,
+                 degree_half_life: float = DECAY_HALF_LIFE_SEC):
+        self._adj = {}              # node -> {neighbor: live transactions}, both directions
+        self._num_edges = 0
+        self.temporal_degree = TemporalDegree(degree_half_life)
+        self.edge_timestamps = {}   # (user, merchant) -> latest transaction ts
+        self.edge_counts = {}       # (user, merchant) -> live transactions in window
         self.window_seconds = window_seconds
+        self.watermark = None       # newest timestamp seen
+        self._in_order = deque()    # (ts, user, merchant, log position), non-decreasing ts
+        self._late = []             # heap of (ts, user, merchant) arriving behind the watermark
+        self._lock = threading.Lock()
+        # Interned append-only event log (positions are logical: physical + _log_base)
+        self._node_ids = {}
+        self._node_names = []
+        self._log_src = np.empty(log_capacity, dtype=np.int64)
+        self._log_dst = np.empty(log_capacity, dtype=np.int64)
+        self._log_ts = np.empty(log_capacity, dtype=np.int64)
+        self._log_base = 0
+        self._log_len = 0           # physical length
+        self._log_head = 0          # logical position of the oldest live in-order event
+
+    def _intern(self, node) -> int:
+        idx = self._node_ids.get(node)
+        if idx is None:
+            idx = self._node_ids[node] = len(self._node_names)
+            self._node_names.append(node)
+        return idx
+
+    def _log_append(self, u, v, ts) -> int:
+        n = self._log_len
+        if n == len(self._log_ts):
+            self._log_reallocate()
+            n = self._log_len
+        self._log_src[n] = self._intern(u)
+        self._log_dst[n] = self._intern(v)
+        self._log_ts[n] = ts
+        self._log_len = n + 1
+        return self._log_base + n
+
+    def _log_reallocate(self):
+        # Drop the expired prefix and/or grow; always new arrays so snapshots keep theirs
+        start = self._log_head - self._log_base
+        live = self._log_len - start
+        capacity = max(len(self._log_ts), 2 * live, 16)
+        parts = {name: getattr(self, name)[start:self._log_len] for name in ('_log_src', '_log_dst', '_log_ts')}
+        # Adjacency nodes are exactly the live ones, so only a half-dead table pays for the unique
+        if 2 * len(self._adj) <= len(self._node_names):
+            self._compact_names(parts)
+        for name, part in parts.items():
+            fresh = np.empty(capacity, dtype=np.int64)
+            fresh[:live] = part
+            setattr(self, name, fresh)
+        self._log_base = self._log_head
+        self._log_len = live
+
+    def _compact_names(self, parts):
+        # Re-intern the nodes of the live log range into a new table (first-seen order
+        # kept) and remap the parts in place; snapshots hold on to the old table
+        live = len(parts['_log_ts'])
+        ids, inverse = np.unique(np.concatenate([parts['_log_src'], parts['_log_dst']]), return_inverse=True)
+        if 2 * len(ids) > len(self._node_names):
+            return
+        names = self._node_names
+        self._node_names = [names[i] for i in ids.tolist()]
+        self._node_ids = {node: i for i, node in enumerate(self._node_names)}
+        parts['_log_src'], parts['_log_dst'] = inverse[:live], inverse[live:]
 
     def add_transaction(self, user_id: str, merchant_id: str, ts: int = None):
         if ts is None:
             ts = int(time.time())
-        self.G.add_edge(user_id, merchant_id)
-        self.edge_timestamps[(user_id, merchant_id)] = ts
-        self._prune(ts)
+        with self._lock:
+            if self.watermark is None or ts >= self.watermark:
+                self.watermark = ts
+                pos = self._log_append(user_id, merchant_id, ts)
+                self._in_order.append((ts, user_id, merchant_id, pos))
+            elif self.watermark - ts > self.window_seconds:
+                return  # already outside the window
+            else:
+                self._log_append(user_id, merchant_id, ts)
+                heapq.heappush(self._late, (ts, user_id, merchant_id))
+            key = (user_id, merchant_id)
+            count = self.edge_counts.get(key, 0) + 1
+            self.edge_counts[key] = count
+            if ts > self.edge_timestamps.get(key, ts - 1):
+                self.edge_timestamps[key] = ts
+            self._link(user_id, merchant_id, 1)
+            self.temporal_degree.add(user_id, merchant_id, ts)
+            self._prune(self.watermark)
+
+    def _link(self, u, v, delta):
+        # Adjust the undirected live count of u-v, dropping the edge at 0 and a node at degree 0
+        adj = self._adj
+        nbrs = adj.get(u)
+        if nbrs is None:
+            nbrs = adj[u] = {}
+        count = nbrs.get(v, 0) + delta
+        if count == delta:
+            self._num_edges += 1
+        if count:
+            nbrs[v] = count
+            if u != v:
+                adj.setdefault(v, {})[u] = count
+            return
+        self._num_edges -= 1
+        del nbrs[v]
+        if u != v:
+            del adj[v][u]
+        for node in (u, v):
+            if node in adj and not adj[node]:
+                del adj[node]
+                self.temporal_degree.discard(node)
+
+    def _expire(self, u, v):
+        key = (u, v)
+        count = self.edge_counts[key] - 1
+        if count:
+            self.edge_counts[key] = count
+        else:
+            del self.edge_counts[key]
+            del self.edge_timestamps[key]
+        self._link(u, v, -1)
 
     def _prune(self, now_ts: int):
-        to_remove = []
-        for (u,v), ts in self.edge_timestamps.items():
-            if now_ts - ts > self.window_seconds:
-                to_remove.append((u,v))
-        for e in to_remove:
-            self.G.remove_edge(*e)
-            del self.edge_timestamps[e]
-
-    def snapshot(self):
-        return self.G.copy(), dict(self.edge_timestamps)
+        cutoff = now_ts - self.window_seconds
+        queue, late = self._in_order, self._late
+        while queue and queue[0][0] < cutoff:
+            _, u, v, _ = queue.popleft()
+            self._expire(u, v)
+        # A late event is older than every in-order event logged after it, so
+        # nothing live precedes the oldest live in-order event in the log
+        self._log_head = queue[0][3] if queue else self._log_base + self._log_len
+        while late and late[0][0] < cutoff:
+            _, u, v = heapq.heappop(late)
+            self._expire(u, v)
+
+    def live_transactions(self) -> int:
+        return len(self._in_order) + len(self._late)
+
+    def __contains__(self, node) -> bool:
+        return node in self._adj
+
+    def neighbors(self, node):
+        """Live neighbors of `node` (a dict view; iterate under `_lock` while ingesting)."""
+        return self._adj[node].keys()
+
+    def degree(self, node) -> int:
+        nbrs = self._adj.get(node)
+        return len(nbrs) if nbrs else 0
+
+    def number_of_nodes(self) -> int:
+        return len(self._adj)
+
+    def number_of_edges(self) -> int:
+        return self._num_edges
+
+    def to_networkx(self) -> nx.Graph:
+        """The live window as a NetworkX graph (edge attribute `count`); O(E)."""
+        with self._lock:
+            G = nx.Graph()
+            G.add_nodes_from(self._adj)
+            G.add_edges_from((u, v, {'count': c}) for u, nbrs in self._adj.items() for v, c in nbrs.items())
+            return G
+
+    def snapshot(self) -> GraphSnapshot:
+        """O(1) consistent read view; use `.to_networkx()` / `.edge_timestamps()` for nx-based code."""
+        with self._lock:
+            if self.watermark is None:
+                return GraphSnapshot(self._log_src, self._log_dst, self._log_ts, 0, 0, 0,
+                                     self._node_names, 0, None)
+            return GraphSnapshot(
+                self._log_src, self._log_dst, self._log_ts,
+                self._log_head - self._log_base, self._log_len,
+                self.watermark - self.window_seconds,
+                self._node_names, len(self._node_names), self.watermark
+            )
@@ -1,21 +1,48 @@
-from py2neo import Graph, Node, Relationship, NodeMatcher
-import networkx as nx
-from community import community_louvain
+import logging
+import threading
+import time
+from collections import Counter
+from py2neo import Graph, NodeMatcher
 import numpy as np
 
+from .graph_export import Neo4jGraphExporter, louvain_partition
+from .graph_writer import BufferedGraphWriter
+from .path_cache import SuspiciousPathCache
+
+logger = logging.getLogger(__name__)
+
 class FraudGraphIntelligence:
-    def __init__(self, graph):
+    PATH_WINDOW_MS = 3600000
+
+    def __init__(self, graph, write_batch_size=500, flush_interval=1.0, community_interval=0,
+                 sole_writer=False):
         self.graph = graph
         self.matcher = NodeMatcher(graph)
+        self.writer = BufferedGraphWriter(graph, batch_size=write_batch_size,
+                                          flush_interval=flush_interval).start()
+        # Only a process that writes every transaction can answer paths from its own window
+        self.path_cache = SuspiciousPathCache(window=self.PATH_WINDOW_MS, sole_writer=sole_writer)
+        self.exporter = Neo4jGraphExporter(graph)
+        # Louvain partition, refreshed every community_interval seconds once the first
+        # detect_fraud_rings call starts the scheduler (0: only on demand, the default)
+        self.community_interval = community_interval
+        self.communities_refreshed_at = None
+        self._partition = {}
+        self._community_sizes = Counter()
+        self._community_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()   # one export sync / Louvain run at a time
+        self._stop = threading.Event()
+        self._community_thread = None
     
     def detect_fraud_rings(self, transaction_data):
         """Detect fraud rings using community detection"""
+        self._start_community_refresh()
         
         # Create or update graph with new transaction
         self._update_graph(transaction_data)
         
-        # Community detection for fraud rings
-        communities = self._detect_communities()
+        # Community of the user from the last scheduled Louvain run
+        communities = self._detect_communities(transaction_data)
         
         # Multi-hop analysis
         suspicious_paths = self._find_suspicious_paths(transaction_data)
@@ -27,64 +54,103 @@ class FraudGraphIntelligence:
         }
     
     def _update_graph(self, transaction):
-        """Update graph with new transaction data"""
-        # Create nodes
-        user_node = Node("User", id=transaction["user_id"], 
-                        risk_score=transaction.get("risk_score", 0))
-        merchant_node = Node("Merchant", id=transaction["merchant_id"])
-        device_node = Node("Device", id=transaction.get("device_id"))
-        
-        # Create relationships
-        made_tx = Relationship(user_node, "MADE_TRANSACTION", merchant_node,
-                             amount=transaction["amount"],
-                             timestamp=transaction["timestamp"])
-        
-        used_device = Relationship(user_node, "USED_DEVICE", device_node)
-        
-        # Merge into graph
-        self.graph.merge(user_node, "User", "id")
-        self.graph.merge(merchant_node, "Merchant", "id")
-        self.graph.merge(device_node, "Device", "id")
-        self.graph.merge(made_tx)
-        self.graph.merge(used_device)
+        """Buffer the transaction for the next batched UNWIND/MERGE flush.
+
+        Writes are not read-your-writes: Neo4j queries (the suspicious-path fallback,
+        the catalog queries of graph-service) see the transaction only after the
+        writer flushes, i.e. after batch_size rows or flush_interval seconds. The
+        local path cache sees it immediately and its paths are merged into the
+        fallback result; code that must read it from Neo4j calls `writer.flush()` first.
+        """
+        self.writer.add(transaction)
+        self.path_cache.add_transaction(transaction)
+
+    def close(self):
+        """Stop the community scheduler, flush buffered writes and stop the background flusher"""
+        self._stop.set()
+        if self._community_thread is not None:
+            self._community_thread.join()
+            self._community_thread = None
+        self.writer.close()
     
-    def _detect_communities(self):
-        """Detect communities using Louvain method"""
-        # Convert to NetworkX for community detection
-        nx_graph = self._to_networkx()
-        
-        if len(nx_graph.nodes) > 0:
-            communities = community_louvain.best_partition(nx_graph)
-            return communities
-        return {}
+    def _start_community_refresh(self):
+        # Lazy, so constructing the object (tests, scripts, idle workers) never scans Neo4j
+        if not self.community_interval or self._community_thread is not None:
+            return
+        with self._community_lock:
+            if self._community_thread is None and not self._stop.is_set():
+                self._community_thread = threading.Thread(target=self._community_loop,
+                                                          name='community-refresh', daemon=True)
+                self._community_thread.start()
+
+    def refresh_communities(self):
+        """Sync the export and recompute the Louvain partition (scheduled or on demand)"""
+        with self._refresh_lock:
+            self._sync_export()
+            partition = louvain_partition(self.exporter.compact)
+        with self._community_lock:
+            self._partition = partition
+            self._community_sizes = Counter(partition.values())
+            self.communities_refreshed_at = time.time()
+        return partition
+    
+    def _community_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_communities()
+            except Exception as e:
+                logger.warning(f"Community refresh failed: {e}")
+            self._stop.wait(self.community_interval)
+    
+    def _detect_communities(self, transaction):
+        """Cached Louvain community of the transaction's user (None before the first refresh)"""
+        with self._community_lock:
+            community_id = self._partition.get(f"User:{transaction['user_id']}")
+            return {
+                "community_id": community_id,
+                "community_size": self._community_sizes.get(community_id, 0) if community_id is not None else 0,
+                "refreshed_at": self.communities_refreshed_at
+            }
     
     def _find_suspicious_paths(self, transaction, max_hops=3):
         """Find suspicious money flow paths"""
-        query = """
-        MATCH path = (start:User {id: $user_id})-[*1..3]-(end)
+        recent_timestamp = transaction["timestamp"] - self.PATH_WINDOW_MS
+        start = time.perf_counter()
+        paths = self.path_cache.lookup(transaction["user_id"], recent_timestamp, max_hops)
+        if paths is not None:
+            self.path_cache.record('local', time.perf_counter() - start)
+            return paths
+
+        # Cache miss: same paths and ranking from Neo4j (node keys as in the cache)
+        query = f"""
+        MATCH path = (start:User {{id: $user_id}})-[*1..{int(max_hops)}]-(end)
         WHERE ALL(r IN relationships(path) WHERE r.timestamp >= $recent_timestamp)
-        RETURN path, 
-               reduce(risk = 0, n in nodes(path) | risk + n.risk_score) as path_risk
+        RETURN [n IN nodes(path) | labels(n)[0] + ':' + toString(n.id)] as path,
+               reduce(risk = 0, n in nodes(path) | risk + coalesce(n.risk_score, 0)) as path_risk
         ORDER BY path_risk DESC
         LIMIT 10
         """
         
+        start = time.perf_counter()
         result = self.graph.run(query, 
                               user_id=transaction["user_id"],
-                              recent_timestamp=transaction["timestamp"] - 3600000)
-        
-        return [dict(record) for record in result]
+                              recent_timestamp=recent_timestamp)
+        paths = [dict(record) for record in result]
+        self.path_cache.record('remote', time.perf_counter() - start)
+        # Add paths through this process's transactions that are still buffered
+        local = self.path_cache.local_paths(transaction["user_id"], recent_timestamp, max_hops)
+        return self.path_cache.merge(paths, local)
+
+    def path_cache_stats(self):
+        """Suspicious-path cache hit rate and local / remote latency percentiles"""
+        return self.path_cache.stats()
     
     def _calculate_graph_risk(self, transaction):
         """Calculate graph-based risk score"""
         # Implementation for graph risk scoring
         return 0.0
     
-    def _to_networkx(self):
-        """Convert Neo4j graph to NetworkX for analysis"""
-        nx_graph = nx.Graph()
-        
-        # Add nodes and edges from Neo4j
-        # Implementation details...
-        
-        return nx_graph
\ No newline at end of file
+    def _sync_export(self):
+        """Page nodes / relationships created since the last export into the compact graph"""
+        self.writer.flush()
+        return self.exporter.sync()
\ No newline at end of file
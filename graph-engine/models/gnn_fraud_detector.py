@@ -1,10 +1,13 @@
 import torch
+import numpy as np
 from torch import nn
 from torch_geometric.nn import SAGEConv
 from torch_geometric.data import Data
 from typing import Dict, Any, Tuple
 import time
 
+from features.node_features import cached_node_features, edge_fraud_prior, FEATURE_NAMES, PAIR_FEATURE_NAMES
+
 class GraphSAGEFraudDetector(nn.Module):
     """GraphSAGE-based node/edge classification for fraud detection.
 
@@ -14,7 +17,8 @@ class GraphSAGEFraudDetector(nn.Module):
     - Labels: Provided per edge (fraud=1 / legit=0) or per node (risk class). This implementation focuses on edge classification.
     """
 
-    def __init__(self, in_dim: int = 32, hidden_dim: int = 64, num_layers: int = 2):
+    def __init__(self, in_dim: int = len(FEATURE_NAMES), hidden_dim: int = 64, num_layers: int = 2,
+                 pair_dim: int = len(PAIR_FEATURE_NAMES)):
         super().__init__()
         self.convs = nn.ModuleList()
         last_dim = in_dim
@@ -22,29 +26,34 @@ class GraphSAGEFraudDetector(nn.Module):
             conv = SAGEConv(last_dim, hidden_dim)
             self.convs.append(conv)
             last_dim = hidden_dim
-        self.head = nn.Linear(last_dim * 2, 1)  # For edge pair representation (src||dst)
+        self.head = nn.Linear(last_dim * 2 + pair_dim, 1)  # For edge pair representation (src||dst||pair features)
 
-    def forward(self, x, edge_index, edge_pairs):
+    def forward(self, x, edge_index, edge_pairs, pair_feats):
         for conv in self.convs:
             x = conv(x, edge_index).relu()
         # Edge representation by concatenating src and dst node embeddings
         src = x[edge_pairs[:,0]]
         dst = x[edge_pairs[:,1]]
-        edge_repr = torch.cat([src, dst], dim=1)
+        edge_repr = torch.cat([src, dst, pair_feats], dim=1)
         logits = self.head(edge_repr).squeeze(-1)
         return logits
 
 
-def build_graph(transactions) -> Tuple[Data, torch.Tensor]:
+def build_graph(transactions, label_mask=None, cache_dir=None) -> Tuple[Data, torch.Tensor]:
     """Build a PyG Data object from transaction records.
-    transactions: list of dicts with keys user_id, merchant_id, device_id(optional), label
-    Returns: (graph_data, edge_pairs_tensor)
-    NOTE: This is a placeholder; integrate with real data loader.
+    transactions: list of dicts with keys user_id, merchant_id, device_id(optional), label,
+    amount(optional), timestamp(optional, epoch seconds)
+    label_mask: optional bool per transaction; only those labels feed the fraud-rate prior
+    cache_dir: optional directory for the per-graph-version node feature cache
+    Returns: (graph_data, edge_pairs_tensor, labels); graph_data.pair_feats holds the
+    leave-one-out fraud-rate prior of each edge's endpoints, aligned with edge_pairs
     """
     # Map entity ids to contiguous indices
     id_map: Dict[Any, int] = {}
     edges = []
     labels = []
+    amounts = []
+    timestamps = []
     for t in transactions:
         u = t['user_id']
         m = t['merchant_id']
@@ -56,11 +65,22 @@ def build_graph(transactions) -> Tuple[Data, torch.Tensor]:
         mid = id_map[m]
         edges.append([uid, mid])
         labels.append(t.get('label', 0))
+        amounts.append(t.get('amount', 0.0))
+        timestamps.append(t.get('timestamp', 0))
     edge_index = torch.tensor(edges, dtype=torch.long).t().contiguous()
     num_nodes = len(id_map)
-    # Random initial node features (Replace with real features: frequency, avg_amount, etc.)
-    x = torch.randn((num_nodes, 32))
+    src, dst = edge_index.numpy()
+    has_amount = any('amount' in t for t in transactions)
+    has_time = any('timestamp' in t for t in transactions)
+    feats = cached_node_features(
+        cache_dir, src, dst, num_nodes,
+        amount=np.asarray(amounts, dtype=np.float32) if has_amount else None,
+        timestamp=np.asarray(timestamps, dtype=np.int64) if has_time else None,
+        label=np.asarray(labels, dtype=np.int8), label_mask=label_mask
+    )
+    x = torch.from_numpy(feats)
     data = Data(x=x, edge_index=edge_index)
+    data.pair_feats = torch.from_numpy(edge_fraud_prior(src, dst, num_nodes, np.asarray(labels), label_mask))
     edge_pairs = edge_index.t()
     return data, edge_pairs, torch.tensor(labels, dtype=torch.float32)
 
@@ -72,7 +92,7 @@ def train(model: GraphSAGEFraudDetector, data: Data, edge_pairs: torch.Tensor, l
     start = time.time()
     for epoch in range(1, epochs+1):
         optimizer.zero_grad()
-        logits = model(data.x, data.edge_index, edge_pairs)
+        logits = model(data.x, data.edge_index, edge_pairs, data.pair_feats)
         loss = criterion(logits, labels)
         loss.backward()
         optimizer.step()
@@ -91,7 +111,7 @@ def train(model: GraphSAGEFraudDetector, data: Data, edge_pairs: torch.Tensor, l
 def evaluate(model: GraphSAGEFraudDetector, data: Data, edge_pairs: torch.Tensor, labels: torch.Tensor):
     model.eval()
     with torch.no_grad():
-        logits = model(data.x, data.edge_index, edge_pairs)
+        logits = model(data.x, data.edge_index, edge_pairs, data.pair_feats)
         probs = logits.sigmoid()
         preds = (probs > 0.5).float()
         acc = (preds == labels).float().mean().item()
@@ -110,7 +130,7 @@ if __name__ == '__main__':
         {'user_id': 'U4', 'merchant_id': 'M3', 'label': 0},
     ]
     data, edge_pairs, labels = build_graph(synthetic_transactions)
-    model = GraphSAGEFraudDetector()
+    model = GraphSAGEFraudDetector(in_dim=data.x.shape[1])
     train_stats = train(model, data, edge_pairs, labels, epochs=6)
     eval_stats = evaluate(model, data, edge_pairs, labels)
     print({'train': train_stats, 'eval': eval_stats})
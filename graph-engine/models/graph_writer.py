@@ -0,0 +1,190 @@
+"""Buffered Neo4j Transaction Writer
+Collects transactions and writes each buffer with one parameterized
+`UNWIND $rows ... MERGE` statement (user, merchant, optional device and both
+relationships) instead of five `graph.merge` round trips per transaction.
+
+A buffer is flushed when it reaches `batch_size` rows or is older than
+`flush_interval` seconds. Once `start()`ed, the background flusher does every
+write and `add` only wakes it, so callers never wait on Neo4j; without it,
+`add` flushes inline and logs (rather than raises) transient failures.
+Transient driver errors are retried with exponential backoff; rows of a flush
+that still fails transiently go back to the front of the buffer. The buffer
+holds at most `max_pending` rows: during an outage, rows past that are
+dead-lettered instead of growing it without limit.
+
+Any other error (a bad row, a Cypher error) would fail again on every retry,
+so the failing statement is bisected until only the bad rows remain; those
+are logged and moved to the bounded `dead_letter` queue, and the rest of the
+batch is written.
+
+`graph` is anything with py2neo's `run(cypher, **parameters)`, so a recording
+stand-in can replace a Neo4j connection in benchmarks.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+try:
+    from py2neo.errors import ServiceUnavailable, TransientError
+    TRANSIENT_ERRORS = (TransientError, ServiceUnavailable, ConnectionError, TimeoutError)
+except ImportError:  # py2neo not installed: stand-in graphs only
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+# Same properties as the former per-transaction graph.merge calls: nodes keyed
+# by id, one MADE_TRANSACTION / USED_DEVICE relationship per pair, last write wins
+MERGE_TRANSACTIONS = """
+UNWIND $rows AS row
+MERGE (u:User {id: row.user_id})
+SET u.risk_score = row.risk_score
+MERGE (m:Merchant {id: row.merchant_id})
+MERGE (u)-[t:MADE_TRANSACTION]->(m)
+SET t.amount = row.amount, t.timestamp = row.timestamp
+FOREACH (_ IN CASE WHEN row.device_id IS NULL THEN [] ELSE [1] END |
+    MERGE (d:Device {id: row.device_id})
+    MERGE (u)-[:USED_DEVICE]->(d))
+"""
+
+
+def transaction_row(transaction: dict) -> dict:
+    return {
+        'user_id': transaction['user_id'],
+        'merchant_id': transaction['merchant_id'],
+        'device_id': transaction.get('device_id'),
+        'risk_score': transaction.get('risk_score', 0),
+        'amount': transaction['amount'],
+        'timestamp': transaction['timestamp'],
+    }
+
+
+class BufferedGraphWriter:
+    def __init__(self, graph, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_retries: int = 3, backoff: float = 0.1, dead_letter_size: int = 100_000,
+                 max_pending: int = 100_000):
+        self.graph = graph
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self.stats = {'rows': 0, 'flushes': 0, 'retries': 0, 'dead_lettered': 0, 'overflowed': 0}
+        self.dead_letter = deque(maxlen=dead_letter_size)   # failing and overflowed rows
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # one statement in flight, rows stay in order
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, transaction: dict):
+        row = transaction_row(transaction)
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                self._overflow([row])
+                return
+            self._rows.append(row)
+            due = (len(self._rows) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if not due:
+            return
+        if self._thread is not None:
+            self._wake.set()
+            return
+        try:
+            self.flush()
+        except TRANSIENT_ERRORS as e:
+            logger.warning(f"Graph write deferred, {len(self._rows)} rows pending: {e}")
+
+    def _overflow(self, rows):
+        # Caller holds _lock; the newest rows go so the buffer keeps write order
+        if not self.stats['overflowed']:
+            logger.warning(f"Graph write buffer full ({self.max_pending} rows), dead-lettering new rows")
+        self.dead_letter.extend(rows)
+        self.stats['overflowed'] += len(rows)
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written.
+
+        Re-raises a transient error after re-queueing the unwritten rows; rows that
+        fail otherwise are dead-lettered and the rest of the batch is still written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            written = self._write(rows)
+            self.stats['rows'] += written
+            self.stats['flushes'] += 1
+            return written
+
+    def _write(self, rows) -> int:
+        # Bisect a non-transiently failing statement down to its bad rows
+        pending, written = [rows], 0
+        while pending:
+            chunk = pending.pop()
+            try:
+                self._run(chunk)
+            except TRANSIENT_ERRORS:
+                unwritten = chunk + [row for part in reversed(pending) for row in part]
+                with self._lock:
+                    self._rows[:0] = unwritten
+                    if len(self._rows) > self.max_pending:
+                        self._overflow(self._rows[self.max_pending:])
+                        del self._rows[self.max_pending:]
+                raise
+            except Exception:
+                if len(chunk) > 1:
+                    mid = len(chunk) // 2
+                    pending.extend([chunk[mid:], chunk[:mid]])
+                    continue
+                logger.exception(f"Graph write failed, dead-lettering row {chunk[0]}")
+                self.dead_letter.extend(chunk)
+                self.stats['dead_lettered'] += 1
+                continue
+            written += len(chunk)
+        return written
+
+    def _run(self, rows):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.graph.run(MERGE_TRANSACTIONS, rows=rows)
+                return
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                self.stats['retries'] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush()
+            except TRANSIENT_ERRORS:
+                pass  # rows were re-queued; try again next interval
+            except Exception:
+                logger.exception("Background graph flush failed")
+
+    def start(self):
+        """Flush in the background every `flush_interval` seconds and whenever `add` finds
+        the buffer due."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='graph-writer', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
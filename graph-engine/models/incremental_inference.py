@@ -0,0 +1,128 @@
+"""Incremental (Online) GraphSAGE Inference
+
+Caches per-layer node embeddings h^l and, for every layer, the running sum of
+in-neighbor embeddings S^l (SAGEConv mean aggregation along src -> dst).
+When a transaction edge u -> m arrives only the affected nodes are recomputed:
+A_1 = {m} plus nodes whose features changed, A_{l+1} = A_l + out-neighbors(A_l).
+Neighbor sums are patched with embedding deltas, so a hub's update costs its
+out-degree rather than its in-degree. The new edge is then scored from the
+cached final embeddings.
+
+Works with GraphSAGEFraudDetector (graph-engine/models and ml-engine/pipelines):
+`model.convs` of mean-aggregation SAGEConv layers, each followed by ReLU, and
+`model.head` over concatenated endpoint embeddings and pair features (the
+endpoints' fraud-rate prior, `features.node_features.edge_fraud_prior`).
+"""
+from collections import defaultdict
+
+import numpy as np
+import torch
+
+
+def _grow(t: torch.Tensor, rows: int) -> torch.Tensor:
+    if rows <= t.shape[0]:
+        return t
+    grown = torch.zeros((max(rows, 2 * t.shape[0]),) + tuple(t.shape[1:]), dtype=t.dtype)
+    grown[:t.shape[0]] = t
+    return grown
+
+
+class IncrementalGNNInference:
+    def __init__(self, model, x: torch.Tensor, edge_index: torch.Tensor):
+        self.model = model.eval()
+        self.convs = list(model.convs)
+        for conv in self.convs:
+            if conv.aggr != 'mean' or conv.project or conv.normalize:
+                raise ValueError('IncrementalGNNInference supports plain mean-aggregation SAGEConv layers only')
+        self.refresh(x, edge_index)
+
+    @torch.no_grad()
+    def refresh(self, x: torch.Tensor, edge_index: torch.Tensor):
+        """Full recompute of all cached layers (also clears accumulated float drift)."""
+        self.num_nodes = x.shape[0]
+        src, dst = edge_index[0], edge_index[1]
+        src_np, dst_np = src.cpu().numpy(), dst.cpu().numpy()
+        # Out-neighbor CSR for delta propagation; online edges go to _extra_out
+        self._out_indptr = np.concatenate([[0], np.cumsum(np.bincount(src_np, minlength=self.num_nodes))])
+        self._out_indices = dst_np[np.argsort(src_np, kind='stable')]
+        self._extra_out = defaultdict(list)
+        self.in_deg = torch.bincount(dst, minlength=self.num_nodes).to(x.dtype)
+        self.h = [x.detach().clone()]
+        self.sums = []
+        for conv in self.convs:
+            h = self.h[-1]
+            s = torch.zeros_like(h).index_add_(0, dst, h[src])
+            self.sums.append(s)
+            self.h.append(self._layer(conv, s, self.in_deg, h))
+
+    @staticmethod
+    def _layer(conv, s, deg, h_root):
+        out = conv.lin_l(s / deg.clamp(min=1).unsqueeze(-1))
+        if conv.root_weight:
+            out = out + conv.lin_r(h_root)
+        return out.relu()
+
+    def _out_neighbors(self, node):
+        parts = []
+        if node < len(self._out_indptr) - 1:
+            parts.append(self._out_indices[self._out_indptr[node]:self._out_indptr[node + 1]])
+        extra = self._extra_out.get(node)
+        if extra:
+            parts.append(np.asarray(extra, dtype=np.int64))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    @torch.no_grad()
+    def add_node(self, features: torch.Tensor) -> int:
+        """Append an unseen node (no edges yet) and return its index."""
+        idx = self.num_nodes
+        self.num_nodes += 1
+        self.in_deg = _grow(self.in_deg, self.num_nodes)
+        self.h = [_grow(h, self.num_nodes) for h in self.h]
+        self.sums = [_grow(s, self.num_nodes) for s in self.sums]
+        self.h[0][idx] = features
+        for l, conv in enumerate(self.convs):
+            self.h[l + 1][idx:idx + 1] = self._layer(conv, self.sums[l][idx:idx + 1], self.in_deg[idx:idx + 1],
+                                                     self.h[l][idx:idx + 1])
+        return idx
+
+    @torch.no_grad()
+    def add_edge(self, u: int, v: int, changed_features=None) -> int:
+        """Insert edge u -> v, optionally with updated feature rows {node: tensor}.
+
+        Returns the number of node embeddings recomputed across layers.
+        """
+        delta = {}
+        for n, feat in (changed_features or {}).items():
+            delta[int(n)] = feat - self.h[0][n]
+            self.h[0][n] = feat
+        self.in_deg[v] += 1
+        recomputed = 0
+        for l, conv in enumerate(self.convs):
+            affected = {v}
+            # Patch neighbor sums of existing out-edges with h^l deltas
+            for n, d in delta.items():
+                targets = self._out_neighbors(n)
+                if targets.size:
+                    self.sums[l].index_add_(0, torch.from_numpy(targets), d.expand(targets.size, -1))
+                    affected.update(targets.tolist())
+                affected.add(n)
+            # The new edge contributes the current h^l_u to v
+            self.sums[l][v] += self.h[l][u]
+            nodes = torch.tensor(sorted(affected), dtype=torch.long)
+            new_h = self._layer(conv, self.sums[l][nodes], self.in_deg[nodes], self.h[l][nodes])
+            delta = dict(zip(nodes.tolist(), new_h - self.h[l + 1][nodes]))
+            self.h[l + 1][nodes] = new_h
+            recomputed += nodes.numel()
+        self._extra_out[u].append(v)
+        return recomputed
+
+    @torch.no_grad()
+    def score_edges(self, pairs: torch.Tensor, pair_feats: torch.Tensor) -> torch.Tensor:
+        h = self.h[-1]
+        return self.model.head(torch.cat([h[pairs[:, 0]], h[pairs[:, 1]], pair_feats], dim=1)).squeeze(-1)
+
+    @torch.no_grad()
+    def add_transaction(self, u: int, v: int, pair_feats: torch.Tensor, changed_features=None) -> float:
+        """Insert u -> v, refresh its k-hop neighborhood and return the fraud probability."""
+        self.add_edge(u, v, changed_features)
+        return float(self.score_edges(torch.tensor([[u, v]]), pair_feats.reshape(1, -1)).sigmoid()[0])
@@ -0,0 +1,146 @@
+"""Local Suspicious-path Cache
+Keeps the recent MADE_TRANSACTION edges seen by this process in an
+`IncrementalGraph` window (timestamps in the same unit as the transactions,
+milliseconds for FraudGraphIntelligence) plus each user's last risk score,
+and answers the `[*1..max_hops]` suspicious-path query with a bounded-depth
+BFS over simple paths: every edge on the path must be at least
+`recent_ts`, and `path_risk` is the sum of node risk scores (0 when unknown).
+Nodes are keyed `<Label>:<id>` (`User:u1`, `Merchant:m1`) as in
+`graph_export`, so a user and a merchant sharing an id stay distinct.
+
+The window only holds this process's transactions, so it is the full graph
+only when this process is the sole writer (`sole_writer=True`). Otherwise
+`lookup` always misses and the caller queries Neo4j, then `merge`s in
+`local_paths` for the transactions not yet flushed there.
+
+`lookup` returns None on a miss, so the caller falls back to Neo4j: this
+process is not the sole writer, the user is not in the window, the requested
+range starts before the cache started ingesting, or the BFS could grow past
+`max_frontier` paths (bounded by degrees before each level is built, so a
+neighborhood through a hub merchant is refused without enumerating it).
+Hits, misses and the latencies of both paths are kept for `stats()`.
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+
+from features.incremental_updater import IncrementalGraph
+
+
+class SuspiciousPathCache:
+    def __init__(self, window: int = 3_600_000, max_hops: int = 3, top_k: int = 10,
+                 max_frontier: int = 5_000, latency_samples: int = 10_000, sole_writer: bool = False):
+        self.graph = IncrementalGraph(window_seconds=window)
+        self.window = window
+        self.max_hops = max_hops
+        self.top_k = top_k
+        self.max_frontier = max_frontier
+        self.sole_writer = sole_writer
+        self.risk = {}              # user key -> (last reported risk score, its timestamp)
+        self._risk_expiry = deque()  # (ts, user key) in arrival order
+        self.since = None   # first timestamp ingested; older ranges are not covered
+        self.hits = 0
+        self.misses = 0
+        self.latency = {'local': deque(maxlen=latency_samples), 'remote': deque(maxlen=latency_samples)}
+
+    def add_transaction(self, transaction: dict):
+        ts = transaction['timestamp']
+        if self.since is None:
+            self.since = ts
+        user = f"User:{transaction['user_id']}"
+        with self.graph._lock:
+            self.risk[user] = (transaction.get('risk_score', 0) or 0, ts)
+            self._risk_expiry.append((ts, user))
+            self._expire_risk(ts - self.window)
+        self.graph.add_transaction(user, f"Merchant:{transaction['merchant_id']}", ts)
+
+    def _expire_risk(self, cutoff):
+        # A user's score goes with its last transaction; later reports re-arm it
+        expiry, risk = self._risk_expiry, self.risk
+        while expiry and expiry[0][0] < cutoff:
+            ts, user = expiry.popleft()
+            entry = risk.get(user)
+            if entry is not None and entry[1] == ts:
+                del risk[user]
+
+    def _score(self, node):
+        entry = self.risk.get(node)
+        return entry[0] if entry is not None else 0
+
+    def _edge_ts(self, a, b):
+        ts = self.graph.edge_timestamps.get((a, b))
+        return self.graph.edge_timestamps.get((b, a)) if ts is None else ts
+
+    def _search(self, user, recent_ts, max_hops):
+        # Caller holds the graph lock; None once more than max_frontier paths are found
+        G, score_of, limit = self.graph, self._score, self.max_frontier
+        # Every live edge is inside the window, so only a shorter range needs the timestamp test
+        check_ts = recent_ts > self.graph.watermark - self.window
+        frontier = [((user,), score_of(user))]
+        found = []
+        for hop in range(max_hops):
+            # Each path extends to at most deg(last) - 1 new nodes (deg for the start),
+            # so a level that could overflow is refused before it is built
+            bound = sum(G.degree(path[-1]) for path, _ in frontier) - (len(frontier) if hop else 0)
+            if len(found) + bound > limit:
+                return None
+            level = []
+            for path, score in frontier:
+                last = path[-1]
+                for nb in G.neighbors(last):
+                    if nb in path or (check_ts and self._edge_ts(last, nb) < recent_ts):
+                        continue
+                    level.append((path + (nb,), score + score_of(nb)))
+            found.extend(level)
+            frontier = level
+        return heapq.nlargest(self.top_k, found, key=lambda item: item[1])
+
+    def local_paths(self, user_id, recent_ts, max_hops: int = None):
+        """Top paths over this process's window only (no coverage check), or None if the
+        search exceeds `max_frontier`; use with `merge` on top of a Neo4j result."""
+        max_hops = self.max_hops if max_hops is None else max_hops
+        user = f"User:{user_id}"
+        with self.graph._lock:
+            if user not in self.graph:
+                return []
+            top = self._search(user, recent_ts, max_hops)
+        return None if top is None else [{'path': list(path), 'path_risk': score} for path, score in top]
+
+    def lookup(self, user_id, recent_ts, max_hops: int = None):
+        """Top `top_k` paths as [{'path': [node keys], 'path_risk'}], or None on a miss."""
+        max_hops = self.max_hops if max_hops is None else max_hops
+        user = f"User:{user_id}"
+        with self.graph._lock:
+            if (not self.sole_writer or self.since is None or recent_ts < self.since
+                    or user not in self.graph):
+                self.misses += 1
+                return None
+            top = self._search(user, recent_ts, max_hops)
+        if top is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [{'path': list(path), 'path_risk': score} for path, score in top]
+
+    def merge(self, remote: list, local: list) -> list:
+        """Top `top_k` of two path lists, one entry per path (the higher risk wins)."""
+        best = {}
+        for item in (remote or []) + (local or []):
+            key = tuple(item['path'])
+            if key not in best or item['path_risk'] > best[key]['path_risk']:
+                best[key] = item
+        return heapq.nlargest(self.top_k, best.values(), key=lambda item: item['path_risk'])
+
+    def record(self, kind: str, seconds: float):
+        self.latency[kind].append(1000 * seconds)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        report = {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+        for kind, samples in self.latency.items():
+            if samples:
+                p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 95, 99])
+                report[f'{kind}_ms'] = {'count': len(samples), 'p50': round(float(p50), 3),
+                                        'p95': round(float(p95), 3), 'p99': round(float(p99), 3)}
+        return report
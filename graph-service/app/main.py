@@ -1,33 +1,213 @@
 from flask import Flask, request, jsonify
 from py2neo import Graph
+from py2neo.errors import ClientError, ConnectionUnavailable, Neo4jError, ServiceUnavailable
+from collections import OrderedDict
+import json
 import os
+import threading
+import time
 
 app = Flask(__name__)
 
-# Neo4j connection
+# Neo4j connection: one Graph (and its connection pool) shared by every request
 graph = Graph(
     os.getenv('NEO4J_URI', 'bolt://neo4j:7687'),
     auth=(os.getenv('NEO4J_USER', 'neo4j'), os.getenv('NEO4J_PASSWORD', 'password'))
 )
 
+# Named read-only queries: cypher, default parameters (None = required), parameter types,
+# result TTL in seconds and whether a hit past half its TTL refreshes in the background
+REFRESH_AHEAD = os.getenv('FRAUD_RINGS_BACKGROUND_REFRESH', '1') == '1'
+QUERY_CATALOG = {
+    'fraud-rings': {
+        'cypher': """
+        MATCH (u:User)-[:MADE_TRANSACTION]->(m:Merchant)
+        WITH u, count(m) as num_merchants
+        WHERE num_merchants > $min_merchants
+        RETURN u.id, num_merchants
+        """,
+        'params': {'min_merchants': 5},
+        'types': {'min_merchants': int},
+        'ttl': int(os.getenv('FRAUD_RINGS_TTL', '60')),
+        'refresh_ahead': REFRESH_AHEAD,
+    },
+    'user-transactions': {
+        'cypher': """
+        MATCH (u:User {id: $user_id})-[t:MADE_TRANSACTION]->(m:Merchant)
+        RETURN m.id AS merchant_id, t.amount AS amount, t.timestamp AS timestamp
+        ORDER BY t.timestamp DESC
+        LIMIT $limit
+        """,
+        'params': {'user_id': None, 'limit': 50},
+        'types': {'user_id': (str, int), 'limit': int},
+        'ttl': 10,
+    },
+    'shared-devices': {
+        'cypher': """
+        MATCH (u:User {id: $user_id})-[:USED_DEVICE]->(d:Device)<-[:USED_DEVICE]-(other:User)
+        RETURN d.id AS device_id, collect(DISTINCT other.id) AS users
+        LIMIT $limit
+        """,
+        'params': {'user_id': None, 'limit': 50},
+        'types': {'user_id': (str, int), 'limit': int},
+        'ttl': 30,
+    },
+}
+
+MAX_CACHE_ENTRIES = int(os.getenv('GRAPH_QUERY_CACHE_SIZE', '1024'))
+_cache = OrderedDict()   # (name, canonical params) -> (expires_at, refresh_at, rows)
+_cache_lock = threading.Lock()
+_key_locks = {}          # cache key -> [lock, holders]; one in-flight Neo4j run per key
+
+
+def _resolve_params(name, params):
+    spec = QUERY_CATALOG[name]
+    if not isinstance(params, dict):
+        raise ValueError(f"Parameters for '{name}' must be an object")
+    unknown = set(params) - set(spec['params'])
+    if unknown:
+        raise ValueError(f"Unknown parameters for '{name}': {sorted(unknown)}")
+    for k, v in params.items():
+        types = spec['types'][k]
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, types):
+            names = ' or '.join(t.__name__ for t in (types if isinstance(types, tuple) else (types,)))
+            raise ValueError(f"Parameter '{k}' for '{name}' must be {names}")
+        if types is int and v < 0:
+            raise ValueError(f"Parameter '{k}' for '{name}' must be non-negative")
+    resolved = {**spec['params'], **params}
+    missing = [k for k, v in resolved.items() if v is None]
+    if missing:
+        raise ValueError(f"Missing parameters for '{name}': {missing}")
+    return resolved
+
+
+def _cache_key(name, params):
+    return name, json.dumps(params, sort_keys=True, default=str)
+
+
+def _execute(name, params, key):
+    rows = graph.run(QUERY_CATALOG[name]['cypher'], **params).data()
+    ttl = QUERY_CATALOG[name]['ttl']
+    now = time.monotonic()
+    with _cache_lock:
+        _cache[key] = (now + ttl, now + ttl / 2, rows)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return rows
+
+
+def _fresh(key):
+    # Caller holds _cache_lock
+    hit = _cache.get(key)
+    return hit if hit is not None and hit[0] > time.monotonic() else None
+
+
+def _acquire_key(key):
+    # Caller holds _cache_lock; the entry stays while anyone holds or waits on its lock
+    entry = _key_locks.get(key)
+    if entry is None:
+        entry = _key_locks[key] = [threading.Lock(), 0]
+    entry[1] += 1
+    return entry
+
+
+def _release_key(key, entry):
+    with _cache_lock:
+        entry[1] -= 1
+        if not entry[1]:
+            del _key_locks[key]
+
+
+def _refresh(name, params, key, entry):
+    # Started with entry's lock held; a failed refresh leaves the entry to expire normally
+    try:
+        _execute(name, params, key)
+    except Exception as e:
+        app.logger.warning(f"{name} refresh failed: {e}")
+    finally:
+        entry[0].release()
+        _release_key(key, entry)
+
+
+def _refresh_ahead(name, params, key):
+    # Caller holds _cache_lock; at most one refresh (or miss) per key runs at a time,
+    # and only in a worker that is actually serving the query
+    entry = _acquire_key(key)
+    if not entry[0].acquire(blocking=False):
+        entry[1] -= 1  # the holder still counts, so the entry stays
+        return
+    threading.Thread(target=_refresh, args=(name, params, key, entry),
+                     name=f'{name}-refresh', daemon=True).start()
+
+
+def run_catalog_query(name, params=None):
+    """Rows of a catalog query, from the TTL cache when fresh; returns (rows, cache_hit).
+    A hit past half its TTL on a `refresh_ahead` query also starts a background refresh,
+    so polling clients keep hitting instead of waiting on the scan at expiry."""
+    if name not in QUERY_CATALOG:
+        raise KeyError(name)
+    params = _resolve_params(name, {} if params is None else params)
+    key = _cache_key(name, params)
+    with _cache_lock:
+        hit = _fresh(key)
+        if hit is not None:
+            if QUERY_CATALOG[name].get('refresh_ahead') and hit[1] <= time.monotonic():
+                _refresh_ahead(name, params, key)
+            return hit[2], True
+        entry = _acquire_key(key)
+    try:
+        with entry[0]:
+            # Concurrent misses wait for the first run instead of scanning again
+            with _cache_lock:
+                hit = _fresh(key)
+            if hit is not None:
+                return hit[2], True
+            rows = _execute(name, params, key)
+    finally:
+        _release_key(key, entry)
+    return rows, False
+
+
+def _catalog_response(name, params):
+    try:
+        rows, hit = run_catalog_query(name, params)
+    except KeyError:
+        return jsonify({'error': f"Unknown query '{name}'", 'queries': sorted(QUERY_CATALOG)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ClientError as e:
+        return jsonify({'error': f"Query '{name}' rejected by Neo4j: {e}"}), 400
+    except (Neo4jError, ConnectionUnavailable, ServiceUnavailable) as e:
+        app.logger.warning(f"{name} query failed: {e}")
+        return jsonify({'error': 'Graph database unavailable'}), 503
+    response = jsonify(rows)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+@app.route('/api/graph/queries', methods=['GET'])
+def list_queries():
+    return jsonify({name: {'params': spec['params'], 'ttl': spec['ttl']} for name, spec in QUERY_CATALOG.items()})
+
 @app.route('/api/graph/query', methods=['POST'])
 def query():
-    data = request.get_json()
-    cypher_query = data['query']
-    result = graph.run(cypher_query).data()
-    return jsonify(result)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('name'), str):
+        return jsonify({'error': 'Arbitrary Cypher is not accepted; send a catalog query name and params',
+                        'queries': sorted(QUERY_CATALOG)}), 400
+    return _catalog_response(data['name'], data.get('params', {}))
 
 @app.route('/api/graph/fraud-rings', methods=['GET'])
 def detect_fraud_rings():
-    # Example query to detect fraud rings
-    query = """
-    MATCH (u:User)-[:MADE_TRANSACTION]->(m:Merchant)
-    WITH u, count(m) as num_merchants
-    WHERE num_merchants > 5
-    RETURN u.id, num_merchants
-    """
-    result = graph.run(query).data()
-    return jsonify(result)
+    params = {}
+    if 'min_merchants' in request.args:
+        params['min_merchants'] = request.args.get('min_merchants', type=int)
+        if params['min_merchants'] is None:
+            return jsonify({'error': "Parameter 'min_merchants' for 'fraud-rings' must be int"}), 400
+    return _catalog_response('fraud-rings', params)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5004)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5004)
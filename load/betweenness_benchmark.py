@@ -0,0 +1,54 @@
+"""Sampled Approximate Betweenness Benchmark (Synthetic)
+For each `--nodes` size, builds a sparse random transaction-like graph
+(preferential attachment) and reports ApproxBetweenness wall time at the
+pivot count implied by `--epsilon` / `--delta`, the exact
+nx.betweenness_centrality time (up to `--exact_max`), the max abs error, and
+the time to re-score the same window from the cache.
+
+Usage:
+  python load/betweenness_benchmark.py --nodes 2000 20000 200000 --epsilon 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from features.temporal_graph_features import ApproxBetweenness  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--nodes', type=int, nargs='+', default=[2_000, 20_000, 200_000])
+    ap.add_argument('--degree', type=int, default=3, help='Edges attached per new node')
+    ap.add_argument('--epsilon', type=float, default=0.05)
+    ap.add_argument('--delta', type=float, default=0.1)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--exact_max', type=int, default=20_000, help='Largest graph to run exact betweenness on')
+    args = ap.parse_args()
+
+    for n in args.nodes:
+        G = nx.barabasi_albert_graph(n, args.degree, seed=0)
+        approx = ApproxBetweenness(args.epsilon, args.delta, workers=args.workers, seed=0)
+        start = time.time()
+        est = approx.compute(G)
+        report = {'nodes': n, 'edges': G.number_of_edges(), 'pivots': len(approx.pivots) or n,
+                  'approx_s': round(time.time() - start, 2)}
+        start = time.perf_counter()
+        approx.compute(G)
+        report['cached_ms'] = round(1000 * (time.perf_counter() - start), 1)
+        if n <= args.exact_max:
+            start = time.time()
+            exact = nx.betweenness_centrality(G)
+            report['exact_s'] = round(time.time() - start, 2)
+            report['max_abs_error'] = max(abs(est[v] - exact[v]) for v in G)
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Graph Context Explanation Latency Benchmark (Synthetic)
+Builds a GraphContextIndex over a synthetic user-merchant graph and reports
+per-node latency for neighbors + community + embedding similarity.
+
+Usage:
+  python load/graph_context_benchmark.py --edges 2000000 --users 200000 --merchants 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ML_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ml-engine'))
+if ML_ENGINE not in sys.path:
+    sys.path.insert(0, ML_ENGINE)
+
+from xai.graph_index import GraphContextIndex  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=2_000_000)
+    ap.add_argument('--users', type=int, default=200_000)
+    ap.add_argument('--merchants', type=int, default=20_000)
+    ap.add_argument('--dim', type=int, default=32)
+    ap.add_argument('--queries', type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    src = rng.integers(0, args.users, args.edges)
+    # Zipf-like merchant popularity so a few hubs carry most traffic
+    dst = args.users + (rng.zipf(1.3, args.edges) % args.merchants)
+    amounts = rng.gamma(2.0, 50.0, args.edges).astype(np.float32)
+    n_nodes = args.users + args.merchants
+    embeddings = rng.standard_normal((n_nodes, args.dim)).astype(np.float32)
+
+    start = time.time()
+    index = GraphContextIndex.from_edges(src, dst, weights=amounts, embeddings=embeddings,
+                                         node_ids=np.arange(n_nodes))
+    build_s = time.time() - start
+
+    nodes = rng.integers(0, n_nodes, args.queries).tolist()
+    lat = []
+    for n in nodes:
+        start = time.time()
+        index.influential_neighbors(n)
+        index.community(n)
+        index.similar_nodes(n)
+        lat.append((time.time() - start) * 1000)
+    lat = np.array(lat)
+    print({
+        'edges': args.edges,
+        'nodes': n_nodes,
+        'build_sec': round(build_s, 2),
+        'p50_ms': round(float(np.percentile(lat, 50)), 3),
+        'p99_ms': round(float(np.percentile(lat, 99)), 3),
+        'max_ms': round(float(lat.max()), 3)
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Sparse Clustering / Neighborhood Entropy Benchmark (Synthetic)
+Builds a user-merchant graph with `--edges` edges plus a sprinkling of
+user-user transfers (so triangles exist), then times the CSR implementations
+of clustering_coefficients / neighborhood_entropy (serial and process pool)
+against the NetworkX versions at `--nx_edges`, reporting the max abs difference.
+
+Usage:
+  python load/graph_metrics_benchmark.py --edges 2000000 --workers 8
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from features.temporal_graph_features import clustering_coefficients, neighborhood_entropy  # noqa: E402
+
+
+def _graph(n, users, merchants, rng):
+    src = rng.integers(0, users, n)
+    dst = users + (rng.zipf(1.5, n) % merchants)
+    transfer = rng.random(n) < 0.1
+    dst = np.where(transfer, rng.integers(0, users, n), dst)
+    G = nx.Graph()
+    G.add_edges_from(zip(src.tolist(), dst.tolist()))
+    return G
+
+
+def nx_entropy(G):
+    ent = {}
+    for n in G.nodes():
+        degs = [G.degree(x) for x in G.neighbors(n)]
+        total = sum(degs)
+        ent[n] = -sum(d / total * math.log(d / total + 1e-9) for d in degs) if degs else 0.0
+    return ent
+
+
+def _max_diff(a, b):
+    return max((abs(a[n] - b[n]) for n in a), default=0.0)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.time()
+    out = fn(*args, **kwargs)
+    return out, round(time.time() - start, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=2_000_000)
+    ap.add_argument('--users', type=int, default=300_000)
+    ap.add_argument('--merchants', type=int, default=30_000)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--nx_edges', type=int, default=200_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    G = _graph(args.edges, args.users, args.merchants, rng)
+    report = {'nodes': G.number_of_nodes(), 'edges': G.number_of_edges()}
+    for name, fn in (('clustering', clustering_coefficients), ('entropy', neighborhood_entropy)):
+        _, report[f'{name}_serial_s'] = _timed(fn, G, workers=1)
+        _, report[f'{name}_pool_s'] = _timed(fn, G, workers=args.workers)
+    print(report)
+
+    if args.nx_edges:
+        G = _graph(args.nx_edges, args.users // 10, args.merchants // 10, rng)
+        report = {'nx_edges': G.number_of_edges()}
+        for name, fn, ref in (('clustering', clustering_coefficients, nx.clustering),
+                              ('entropy', neighborhood_entropy, nx_entropy)):
+            fast, report[f'{name}_sparse_s'] = _timed(fn, G, workers=1)
+            slow, report[f'{name}_networkx_s'] = _timed(ref, G)
+            report[f'{name}_max_abs_diff'] = _max_diff(fast, slow)
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Compact Graph Store vs NetworkX Memory Benchmark (Synthetic)
+Bulk-appends `--edges` typed transaction edges into CompactGraph and reports
+bytes/edge (COO columns, CSR, interned id map). NetworkX is measured with
+tracemalloc on `--nx_edges` edges (a 10M-edge nx.Graph does not fit on small
+machines) and extrapolated per edge.
+
+Usage:
+  python load/graph_store_memory_benchmark.py --edges 10000000 --nx_edges 500000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from compact_graph import CompactGraph  # noqa: E402
+
+
+def _keys(prefix, ids):
+    return np.char.add(prefix, ids.astype(str)).astype(object)
+
+
+def synthetic_edges(n, accounts, merchants, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'src': _keys('acct:', rng.integers(0, accounts, n)),
+        'dst': _keys('mch:', rng.integers(0, merchants, n)),
+        'timestamp': 1_735_689_600 + np.sort(rng.integers(0, 30 * 86400, n)),
+        'amount': rng.lognormal(3, 1, n).astype(np.float32)
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=10_000_000)
+    ap.add_argument('--accounts', type=int, default=2_000_000)
+    ap.add_argument('--merchants', type=int, default=200_000)
+    ap.add_argument('--chunk', type=int, default=1_000_000)
+    ap.add_argument('--nx_edges', type=int, default=500_000)
+    args = ap.parse_args()
+
+    graph = CompactGraph()
+    tracemalloc.start()
+    start = time.time()
+    for lo in range(0, args.edges, args.chunk):
+        n = min(args.chunk, args.edges - lo)
+        e = synthetic_edges(n, args.accounts, args.merchants, seed=lo)
+        graph.add_edges(e['src'], e['dst'], etype='purchase', timestamp=e['timestamp'], amount=e['amount'],
+                        src_type='account', dst_type='merchant')
+        del e
+    append_s = time.time() - start
+    start = time.time()
+    graph.csr()
+    csr_s = time.time() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrays = graph.nbytes()
+    print({
+        'store': 'compact',
+        'edges': graph.num_edges,
+        'nodes': graph.num_nodes,
+        'append_edges_per_sec': round(graph.num_edges / append_s, 1),
+        'csr_build_s': round(csr_s, 2),
+        'array_bytes_per_edge': round(arrays / graph.num_edges, 1),
+        'total_bytes_per_edge': round(traced / graph.num_edges, 1),
+        'total_mb': round(traced / 2**20, 1)
+    })
+    del graph
+
+    e = synthetic_edges(args.nx_edges, args.accounts, args.merchants)
+    tracemalloc.start()
+    G = nx.Graph()
+    G.add_nodes_from(e['src'].tolist(), ntype='account')
+    G.add_nodes_from(e['dst'].tolist(), ntype='merchant')
+    G.add_edges_from(
+        (s, d, {'etype': 'purchase', 'timestamp': int(t), 'amount': float(a)})
+        for s, d, t, a in zip(e['src'].tolist(), e['dst'].tolist(), e['timestamp'].tolist(), e['amount'].tolist())
+    )
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_edge = traced / G.number_of_edges()
+    print({
+        'store': 'networkx',
+        'edges': G.number_of_edges(),
+        'bytes_per_edge': round(per_edge, 1),
+        'extrapolated_mb_at_target': round(per_edge * args.edges / 2**20, 1)
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Incremental GraphSAGE Inference Latency Benchmark (Synthetic)
+Compares scoring a newly arriving transaction with a full forward pass
+against IncrementalGNNInference (cached per-layer embeddings, k-hop refresh).
+
+Usage:
+  python load/incremental_gnn_benchmark.py --edges 1000000 --users 100000 --merchants 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from models.gnn_fraud_detector import GraphSAGEFraudDetector  # noqa: E402
+from models.incremental_inference import IncrementalGNNInference  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=1_000_000)
+    ap.add_argument('--users', type=int, default=100_000)
+    ap.add_argument('--merchants', type=int, default=10_000)
+    ap.add_argument('--queries', type=int, default=200)
+    ap.add_argument('--full_queries', type=int, default=5)
+    args = ap.parse_args()
+
+    torch.manual_seed(0)
+    n = args.users + args.merchants
+    model = GraphSAGEFraudDetector().eval()
+    x = torch.randn(n, model.convs[0].in_channels)
+    edge_index = torch.stack([torch.randint(0, args.users, (args.edges,)),
+                              torch.randint(args.users, n, (args.edges,))])
+
+    start = time.time()
+    engine = IncrementalGNNInference(model, x, edge_index)
+    build_s = time.time() - start
+
+    rng = np.random.default_rng(0)
+    arrivals = np.stack([rng.integers(0, args.users, args.queries), rng.integers(args.users, n, args.queries)], 1)
+    pair_feats = torch.rand(args.queries, model.head.in_features - 2 * model.convs[-1].out_channels)
+
+    full = []
+    with torch.no_grad():
+        for i, (u, v) in enumerate(arrivals[:args.full_queries]):
+            edge_index = torch.cat([edge_index, torch.tensor([[u], [v]])], 1)
+            start = time.perf_counter()
+            model(x, edge_index, torch.tensor([[u, v]]), pair_feats[i:i + 1]).sigmoid()
+            full.append(time.perf_counter() - start)
+
+    engine.refresh(x, edge_index[:, :args.edges])
+    inc = []
+    for i, (u, v) in enumerate(arrivals):
+        start = time.perf_counter()
+        engine.add_transaction(int(u), int(v), pair_feats[i])
+        inc.append(time.perf_counter() - start)
+
+    with torch.no_grad():
+        final_edges = torch.cat([edge_index[:, :args.edges], torch.from_numpy(arrivals.T.copy())], 1)
+        expected = model(x, final_edges, torch.from_numpy(arrivals), pair_feats).sigmoid()
+    got = engine.score_edges(torch.from_numpy(arrivals), pair_feats).sigmoid()
+    print({
+        'edges': args.edges,
+        'build_s': round(build_s, 2),
+        'full_forward_ms': round(1000 * float(np.median(full)), 2),
+        'incremental_p50_ms': round(1000 * float(np.percentile(inc, 50)), 3),
+        'incremental_p99_ms': round(1000 * float(np.percentile(inc, 99)), 3),
+        'speedup': round(float(np.median(full) / np.median(inc)), 1),
+        'max_abs_diff': float((expected - got).abs().max())
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""IncrementalGraph Streaming Ingestion Benchmark (Synthetic)
+Fills the rolling window to `--live_edges` transactions, then measures
+sustained inserts/sec while expiry keeps the live set at steady state, and
+times snapshot() (O(1) view, plus building its CSR) against a full
+NetworkX + dict copy of the window.
+`--legacy_live_edges` runs the previous full-scan pruning for comparison
+(at a small size: it is O(E) per insert).
+
+Usage:
+  python load/incremental_graph_benchmark.py --live_edges 10000000 --measure 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from features.incremental_updater import IncrementalGraph  # noqa: E402
+
+
+class LegacyIncrementalGraph(IncrementalGraph):
+    """Previous behaviour: NetworkX graph, overwrite pair timestamp, scan every edge on insert."""
+
+    def __init__(self, window_seconds):
+        super().__init__(window_seconds)
+        self.G = nx.Graph()
+
+    def number_of_edges(self):
+        return self.G.number_of_edges()
+
+    def add_transaction(self, user_id, merchant_id, ts=None):
+        self.G.add_edge(user_id, merchant_id)
+        self.edge_timestamps[(user_id, merchant_id)] = ts
+        to_remove = [e for e, t in self.edge_timestamps.items() if ts - t > self.window_seconds]
+        for e in to_remove:
+            self.G.remove_edge(*e)
+            del self.edge_timestamps[e]
+
+
+def _stream(n, users, merchants, rate, seed, start_ts=0):
+    rng = np.random.default_rng(seed)
+    u = rng.integers(0, users, n).tolist()
+    m = (users + rng.integers(0, merchants, n)).tolist()
+    ts = (start_ts + np.arange(n) // rate).tolist()
+    return u, m, ts
+
+
+def _run(graph, live_edges, measure, users, merchants, rate):
+    u, m, ts = _stream(live_edges, users, merchants, rate, seed=0)
+    start = time.time()
+    for a, b, t in zip(u, m, ts):
+        graph.add_transaction(a, b, t)
+    fill_s = time.time() - start
+    u, m, ts = _stream(measure, users, merchants, rate, seed=1, start_ts=ts[-1] + 1)
+    start = time.time()
+    for a, b, t in zip(u, m, ts):
+        graph.add_transaction(a, b, t)
+    elapsed = time.time() - start
+    snapshot_ms = {}
+    if not isinstance(graph, LegacyIncrementalGraph):
+        start = time.perf_counter()
+        snap = graph.snapshot()
+        snapshot_ms['snapshot_ms'] = round(1000 * (time.perf_counter() - start), 3)
+        start = time.perf_counter()
+        snap.csr()
+        snapshot_ms['snapshot_csr_ms'] = round(1000 * (time.perf_counter() - start), 1)
+        start = time.perf_counter()
+        graph.to_networkx(), dict(graph.edge_timestamps)
+        snapshot_ms['full_copy_ms'] = round(1000 * (time.perf_counter() - start), 1)
+    return {
+        'live_edges_target': live_edges,
+        'graph_edges': graph.number_of_edges(),
+        'fill_inserts_per_sec': round(live_edges / fill_s, 1),
+        'steady_inserts_per_sec': round(measure / elapsed, 1),
+        **snapshot_ms
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--live_edges', type=int, default=10_000_000)
+    ap.add_argument('--measure', type=int, default=1_000_000)
+    ap.add_argument('--users', type=int, default=2_000_000)
+    ap.add_argument('--merchants', type=int, default=200_000)
+    ap.add_argument('--rate', type=int, default=1000, help='Transactions per event-time second')
+    ap.add_argument('--legacy_live_edges', type=int, default=20_000)
+    args = ap.parse_args()
+
+    window = args.live_edges // args.rate
+    result = _run(IncrementalGraph(window), args.live_edges, args.measure, args.users, args.merchants, args.rate)
+    graph_live = result.pop('graph_edges')
+    print({'impl': 'queue_heap', 'window_s': window, 'graph_edges': graph_live, **result})
+
+    if args.legacy_live_edges:
+        legacy_window = args.legacy_live_edges // args.rate
+        measure = min(args.measure, 5 * args.legacy_live_edges // 100)
+        result = _run(LegacyIncrementalGraph(legacy_window), args.legacy_live_edges, measure,
+                      args.users, args.merchants, args.rate)
+        result.pop('graph_edges')
+        print({'impl': 'legacy_scan', 'window_s': legacy_window, **result})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Batched Neo4j Write Benchmark
+Writes `--tx` synthetic transactions through BufferedGraphWriter and reports
+statements, retries and throughput against the previous five round trips per
+transaction. Without `--uri` the target is an in-memory stand-in that sleeps
+`--rtt_ms` per statement and fails a share of statements transiently; with
+`--uri` it is a real Neo4j (e.g. the docker-compose container).
+
+Usage:
+  python load/neo4j_write_benchmark.py --tx 20000 --batch_size 500
+  python load/neo4j_write_benchmark.py --uri bolt://localhost:7687 --password password123
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from models.graph_writer import BufferedGraphWriter  # noqa: E402
+
+
+class StandInGraph:
+    """Records statements; each run() costs one simulated round trip."""
+
+    def __init__(self, rtt_ms=1.0, failure_rate=0.0, seed=0):
+        self.rtt = rtt_ms / 1000
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.statements = 0
+        self.rows = 0
+
+    def run(self, cypher, **parameters):
+        time.sleep(self.rtt)
+        if self.rng.random() < self.failure_rate:
+            raise ConnectionError('simulated transient failure')
+        self.statements += 1
+        self.rows += len(parameters.get('rows', ()))
+
+
+def _transactions(n, rng):
+    for i in range(n):
+        yield {'user_id': f'u{rng.randrange(50_000)}', 'merchant_id': f'm{rng.randrange(5_000)}',
+               'device_id': f'd{rng.randrange(60_000)}' if rng.random() < 0.9 else None,
+               'amount': round(rng.uniform(1, 500), 2), 'timestamp': 1_700_000_000_000 + i * 100}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tx', type=int, default=20_000)
+    ap.add_argument('--batch_size', type=int, default=500)
+    ap.add_argument('--flush_interval', type=float, default=1.0)
+    ap.add_argument('--rtt_ms', type=float, default=1.0)
+    ap.add_argument('--failure_rate', type=float, default=0.01)
+    ap.add_argument('--uri', type=str, default=None)
+    ap.add_argument('--user', type=str, default='neo4j')
+    ap.add_argument('--password', type=str, default='password')
+    args = ap.parse_args()
+
+    if args.uri:
+        from py2neo import Graph
+        graph = Graph(args.uri, auth=(args.user, args.password))
+    else:
+        graph = StandInGraph(args.rtt_ms, args.failure_rate)
+    writer = BufferedGraphWriter(graph, batch_size=args.batch_size, flush_interval=args.flush_interval)
+    rng = random.Random(0)
+    start = time.time()
+    for tx in _transactions(args.tx, rng):
+        writer.add(tx)
+    writer.close()
+    elapsed = time.time() - start
+    report = {'transactions': args.tx, 'batch_size': args.batch_size, **writer.stats,
+              'tx_per_s': round(args.tx / elapsed), 'elapsed_s': round(elapsed, 2)}
+    if not args.uri:
+        report['legacy_round_trips'] = 5 * args.tx
+        report['legacy_est_s'] = round(5 * args.tx * args.rtt_ms / 1000, 1)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
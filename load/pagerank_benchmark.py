@@ -0,0 +1,100 @@
+"""Incremental Time-decayed PageRank Benchmark (Synthetic)
+Loads `--edges` timestamped user->merchant edges into IncrementalPageRank,
+then streams batches of `--batch` new edges and reports warm-started refresh
+latency against a cold recompute on the same sparse matrices and, at
+`--nx_edges`, the previous NetworkX rebuild (time_decayed_pagerank before).
+
+Usage:
+  python load/pagerank_benchmark.py --edges 1000000 --batch 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from features.temporal_graph_features import IncrementalPageRank, time_decay_weight  # noqa: E402
+
+
+def _edges(n, users, merchants, t_start, rate, rng):
+    src = rng.integers(0, users, n)
+    # Merchant popularity is skewed; a few merchants pay back to users
+    dst = users + (rng.zipf(1.5, n) % merchants)
+    back = rng.random(n) < 0.05
+    src, dst = np.where(back, dst, src), np.where(back, src, dst)
+    ts = t_start + np.arange(n) // rate
+    return src, dst, ts
+
+
+def legacy_pagerank(edge_timestamps, now_ts, alpha=0.85):
+    weighted = nx.DiGraph()
+    for (u, v), ts in edge_timestamps.items():
+        w = time_decay_weight(now_ts - ts)
+        if weighted.has_edge(u, v):
+            weighted[u][v]['weight'] += w
+        else:
+            weighted.add_edge(u, v, weight=w)
+    return nx.pagerank(weighted, alpha=alpha, weight='weight')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=1_000_000)
+    ap.add_argument('--users', type=int, default=200_000)
+    ap.add_argument('--merchants', type=int, default=20_000)
+    ap.add_argument('--batch', type=int, default=10_000)
+    ap.add_argument('--batches', type=int, default=10)
+    ap.add_argument('--rate', type=int, default=100, help='Edges per event-time second')
+    ap.add_argument('--nx_edges', type=int, default=100_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    pr = IncrementalPageRank()
+    src, dst, ts = _edges(args.edges, args.users, args.merchants, 0, args.rate, rng)
+    start = time.time()
+    pr.add_edges(src, dst, ts)
+    iters = pr.refresh()
+    print({'initial_edges': args.edges, 'nodes': pr.num_nodes, 'initial_s': round(time.time() - start, 2),
+           'iterations': iters})
+
+    t_next = int(ts[-1]) + 1
+    warm_ms, warm_iters, cold_ms, cold_iters = [], [], [], []
+    for _ in range(args.batches):
+        src, dst, ts = _edges(args.batch, args.users, args.merchants, t_next, args.rate, rng)
+        t_next = int(ts[-1]) + 1
+        start = time.perf_counter()
+        pr.add_edges(src, dst, ts)
+        warm_iters.append(pr.refresh())
+        warm_ms.append(1000 * (time.perf_counter() - start))
+        warm = pr.x
+        pr.x = np.zeros(0)  # cold start on the same matrices
+        start = time.perf_counter()
+        cold_iters.append(pr.refresh())
+        cold_ms.append(1000 * (time.perf_counter() - start))
+        pr.x = warm
+    print({
+        'batch': args.batch,
+        'warm_refresh_ms_p50': round(float(np.median(warm_ms)), 1),
+        'warm_iterations_p50': float(np.median(warm_iters)),
+        'cold_recompute_ms_p50': round(float(np.median(cold_ms)), 1),
+        'cold_iterations_p50': float(np.median(cold_iters))
+    })
+
+    if args.nx_edges:
+        src, dst, ts = _edges(args.nx_edges, args.users, args.merchants, 0, args.rate, rng)
+        edge_timestamps = {}
+        for u, v, t in zip(src.tolist(), dst.tolist(), ts.tolist()):
+            edge_timestamps[(u, v)] = t
+        start = time.time()
+        legacy_pagerank(edge_timestamps, int(ts[-1]))
+        print({'legacy_networkx_edges': len(edge_timestamps), 'legacy_s': round(time.time() - start, 2)})
+
+
+if __name__ == '__main__':
+    main()
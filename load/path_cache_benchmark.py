@@ -0,0 +1,63 @@
+"""Local Suspicious-path Cache Benchmark (Synthetic)
+Streams transactions (millisecond timestamps) into a sole-writer
+SuspiciousPathCache and, after each one, looks up the sender's 1..3-hop paths
+over the last hour as FraudGraphIntelligence._find_suspicious_paths does.
+Misses are charged the refused local search plus a simulated `--remote_ms`
+Neo4j round trip. The first
+`--warmup` transactions (default: one hour of event time) fill the window and
+are not measured; the stats printed (hit rate, local / remote latency
+percentiles) cover the next `--tx` transactions on a warm window.
+
+Usage:
+  python load/path_cache_benchmark.py --tx 20000 --users 20000 --merchants 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from models.path_cache import SuspiciousPathCache  # noqa: E402
+
+WINDOW_MS = 3_600_000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tx', type=int, default=20_000)
+    ap.add_argument('--warmup', type=int, default=None, help='Defaults to one window of event time')
+    ap.add_argument('--users', type=int, default=20_000)
+    ap.add_argument('--merchants', type=int, default=2_000)
+    ap.add_argument('--tx_per_s', type=float, default=20.0, help='Event-time transaction rate')
+    ap.add_argument('--remote_ms', type=float, default=25.0)
+    ap.add_argument('--max_frontier', type=int, default=5_000)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    warmup = int(WINDOW_MS / 1000 * args.tx_per_s) if args.warmup is None else args.warmup
+    cache = SuspiciousPathCache(window=WINDOW_MS, max_frontier=args.max_frontier, sole_writer=True)
+    ts = 1_700_000_000_000
+    start = time.time()
+    for i in range(warmup + args.tx):
+        if i == warmup:
+            start = time.time()
+        ts += int(rng.expovariate(args.tx_per_s) * 1000)
+        tx = {'user_id': f'u{rng.randrange(args.users)}', 'merchant_id': f'm{int(rng.paretovariate(1.2)) % args.merchants}',
+              'risk_score': rng.random(), 'timestamp': ts}
+        cache.add_transaction(tx)
+        if i < warmup:
+            continue
+        t0 = time.perf_counter()
+        hit = cache.lookup(tx['user_id'], ts - WINDOW_MS) is not None
+        elapsed = time.perf_counter() - t0
+        # A miss pays for the refused local search on top of the Neo4j round trip
+        cache.record('local' if hit else 'remote', elapsed if hit else elapsed + args.remote_ms / 1000)
+    print({'warmup': warmup, 'transactions': args.tx, 'elapsed_s': round(time.time() - start, 2), **cache.stats()})
+
+
+if __name__ == '__main__':
+    main()
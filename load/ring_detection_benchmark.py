@@ -0,0 +1,93 @@
+"""Fraud Ring Detection Benchmark (Synthetic)
+Plants `--rings` dense account/device rings (a share of members flagged as
+fraud) in a sparse random account-merchant graph of `--edges` edges, then
+reports RingDetector full labeling time, incremental refine latency for
+batches of `--batch` new edges, how many planted rings rank in the first
+page, and greedy modularity time (the previous detect_rings) at `--nx_edges`.
+
+Usage:
+  python load/ring_detection_benchmark.py --edges 2000000 --batch 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+GRAPH_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph-engine'))
+if GRAPH_ENGINE not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE)
+
+from analytics.ring_detector import RingDetector  # noqa: E402
+
+
+def _background(n, users, merchants, rng):
+    return ([f'acct:{u}' for u in rng.integers(0, users, n).tolist()],
+            [f'mch:{m}' for m in rng.zipf(1.5, n) % merchants])
+
+
+def _rings(count, size, rng):
+    src, dst, fraud = [], [], []
+    for r in range(count):
+        members = [f'ring{r}:acct:{i}' for i in range(size)]
+        devices = [f'ring{r}:dev:{i}' for i in range(max(2, size // 4))]
+        for m in members:
+            for d in rng.choice(devices, 2, replace=False).tolist():
+                src.append(m)
+                dst.append(d)
+        fraud.extend(members[:size // 2])
+    return src, dst, fraud
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--edges', type=int, default=2_000_000)
+    ap.add_argument('--users', type=int, default=500_000)
+    ap.add_argument('--merchants', type=int, default=50_000)
+    ap.add_argument('--rings', type=int, default=50)
+    ap.add_argument('--ring_size', type=int, default=20)
+    ap.add_argument('--batch', type=int, default=10_000)
+    ap.add_argument('--batches', type=int, default=10)
+    ap.add_argument('--nx_edges', type=int, default=50_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    detector = RingDetector()
+    src, dst = _background(args.edges, args.users, args.merchants, rng)
+    ring_src, ring_dst, fraud = _rings(args.rings, args.ring_size, rng)
+    start = time.time()
+    detector.add_edges(src + ring_src, dst + ring_dst)
+    detector.mark_fraud(fraud)
+    sweeps = detector.refine()
+    page = detector.rings(page_size=args.rings)
+    planted = sum(r['fraud_density'] > 0 for r in page['rings'])
+    print({'nodes': detector.graph.num_nodes, 'edges': detector.graph.num_edges, 'sweeps': sweeps,
+           'full_s': round(time.time() - start, 2), 'num_rings': page['num_rings'],
+           'fraud_rings_in_first_page': planted})
+
+    refine_ms = []
+    for _ in range(args.batches):
+        src, dst = _background(args.batch, args.users, args.merchants, rng)
+        start = time.perf_counter()
+        detector.add_edges(src, dst)
+        detector.refine()
+        refine_ms.append(1000 * (time.perf_counter() - start))
+    print({'batch': args.batch, 'incremental_refine_ms_p50': round(float(np.median(refine_ms)), 1)})
+
+    if args.nx_edges:
+        src, dst = _background(args.nx_edges, args.users // 10, args.merchants // 10, rng)
+        G = nx.Graph()
+        G.add_edges_from(zip(src, dst))
+        start = time.time()
+        nx.algorithms.community.greedy_modularity_communities(G)
+        greedy_s = time.time() - start
+        start = time.time()
+        RingDetector.from_networkx(G).rings()
+        print({'nx_edges': G.number_of_edges(), 'greedy_modularity_s': round(greedy_s, 2),
+               'label_propagation_s': round(time.time() - start, 2)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""TransactionTransformer Sequence Scoring Benchmark (Synthetic)
+Compares random vs length-bucketed batches (padding fraction, rows/sec) and
+reports online scoring latency through UserSequenceCache.
+
+Usage:
+  python load/sequence_scoring_benchmark.py --rows 200000 --users 20000 --max_len 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+ML_ENGINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ml-engine'))
+for path in (ML_ENGINE, os.path.join(ML_ENGINE, 'pipelines')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from models.transaction_transformer import TransactionTransformer  # noqa: E402
+from sequence_dataset import LengthBucketSampler, TransactionSequenceDataset, UserSequenceCache  # noqa: E402
+
+
+def synthetic_frame(rows, users, seed=0):
+    rng = np.random.default_rng(seed)
+    # Zipf-like activity: a few heavy users, a long tail with short histories
+    account = rng.zipf(1.3, rows) % users
+    ts = np.sort(rng.integers(1_735_689_600, 1_735_689_600 + 30 * 86400, rows))
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(ts, unit='s', utc=True).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'account_id': np.char.add('A', account.astype(str)),
+        'merchant_id': np.char.add('M', rng.integers(0, 500, rows).astype(str)),
+        'amount': np.round(rng.lognormal(3, 1, rows), 2),
+        'currency': 'USD',
+        'channel': rng.choice(['web', 'mobile', 'pos'], rows),
+        'label': (rng.random(rows) < 0.01).astype(int)
+    })
+
+
+def _score_batches(model, ds, batches):
+    real = padded = 0
+    start = time.time()
+    with torch.inference_mode():
+        for ids in batches:
+            batch = ds[ids]
+            model(batch['seq'], src_key_padding_mask=batch['padding_mask'])
+            real += int(ds.seq_len[ids].sum())
+            padded += batch['seq'].shape[0] * len(ids)
+    elapsed = time.time() - start
+    return {'padding_fraction': round(1 - real / padded, 3), 'rows_per_sec': round(len(ds) / elapsed, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=200_000)
+    ap.add_argument('--users', type=int, default=20_000)
+    ap.add_argument('--max_len', type=int, default=32)
+    ap.add_argument('--batch_size', type=int, default=512)
+    ap.add_argument('--online', type=int, default=2000)
+    args = ap.parse_args()
+
+    torch.manual_seed(0)
+    df = synthetic_frame(args.rows, args.users)
+    start = time.time()
+    ds = TransactionSequenceDataset.from_frame(df, max_len=args.max_len)
+    print({'build_s': round(time.time() - start, 2), 'rows': len(ds)})
+    model = TransactionTransformer().eval()
+
+    order = np.random.default_rng(0).permutation(len(ds))
+    random_batches = [order[i:i + args.batch_size].tolist() for i in range(0, len(ds), args.batch_size)]
+    print({'batching': 'random', **_score_batches(model, ds, random_batches)})
+    bucketed = list(LengthBucketSampler(ds.seq_len, batch_size=args.batch_size))
+    print({'batching': 'length_bucketed', **_score_batches(model, ds, bucketed)})
+
+    cache = UserSequenceCache(max_len=args.max_len)
+    cache.warm(ds)
+    tail = synthetic_frame(args.online, args.users, seed=1)
+    ts = pd.to_datetime(tail['timestamp'], utc=True).astype('int64').to_numpy() // 10**9 + 30 * 86400
+    latencies = []
+    for i in range(args.online):
+        row = tail.iloc[i]
+        start = time.perf_counter()
+        cache.score(model, [row['account_id']], [row['amount']], [ts[i]],
+                    {'channel': [row['channel']], 'currency': [row['currency']], 'merchant_id': [row['merchant_id']]})
+        latencies.append(time.perf_counter() - start)
+    print({
+        'online_p50_ms': round(1000 * float(np.percentile(latencies, 50)), 3),
+        'online_p99_ms': round(1000 * float(np.percentile(latencies, 99)), 3)
+    })
+
+
+if __name__ == '__main__':
+    main()
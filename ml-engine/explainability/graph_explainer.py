@@ -1,24 +1,167 @@
 """Graph Explanation (Algorithm 2 Placeholder)
+
+Communities are computed once per graph version into a node -> community-id
+index (`CommunityIndex`). Edge updates made through the index are repaired
+locally; a full re-clustering only happens after enough edits have
+accumulated or when the graph changes outside the index.
+
+Outside changes are detected through `G.graph['version']` when the caller
+maintains one (O(1)); otherwise through an O(V + E) content fingerprint
+(order-free sums of node and edge hashes), which the index advances in O(1)
+for its own edits. `GraphExplainer` keeps its indexes on `G.graph`, so they
+live exactly as long as the graph.
 """
+from collections import Counter
+
 import networkx as nx
 
+_MASK = (1 << 64) - 1
+_INDEX_KEY = '_community_indexes'
+
+
+def _edge_hash(u, v) -> int:
+    return hash(frozenset((u, v))) & _MASK
+
+
+def graph_version(G: nx.Graph):
+    # Callers that mutate G directly can bump G.graph['version'] for an O(1) check
+    if 'version' in G.graph:
+        return G.graph['version']
+    return (G.number_of_nodes(), G.number_of_edges(),
+            sum(hash(n) for n in G.nodes()) & _MASK,
+            sum(_edge_hash(u, v) for u, v in G.edges()) & _MASK)
+
+
+class CommunityIndex:
+    def __init__(self, G: nx.Graph, resolution=1.0, rebuild_ratio=0.1):
+        self.G = G
+        self.resolution = resolution
+        self.rebuild_ratio = rebuild_ratio
+        self.node_to_comm = {}
+        self.members = {}
+        self.version = None
+        self._next_id = 0
+        self._dirty = 0
+        self.rebuild()
+
+    def rebuild(self):
+        self.node_to_comm = {}
+        self.members = {}
+        self._next_id = 0
+        if self.G.number_of_edges() > 0:
+            communities = nx.algorithms.community.greedy_modularity_communities(
+                self.G, resolution=self.resolution)
+        else:
+            communities = [{n} for n in self.G.nodes()]
+        for c in communities:
+            self._new_community(c)
+        self._dirty = 0
+        self.version = graph_version(self.G)
+
+    def is_stale(self) -> bool:
+        return self.version != graph_version(self.G)
+
+    def community_of(self, node):
+        return self.node_to_comm.get(node)
+
+    def members_of(self, comm_id):
+        return self.members.get(comm_id, set())
+
+    def add_edge(self, u, v, **attr):
+        new_nodes = [n for n in dict.fromkeys((u, v)) if n not in self.G]
+        new_edge = not self.G.has_edge(u, v)
+        self.G.add_edge(u, v, **attr)
+        self._advance(new_nodes, [(u, v)] if new_edge else [], 1)
+        for n in (u, v):
+            if n not in self.node_to_comm:
+                self._new_community({n})
+        self._repair((u, v))
+
+    def remove_edge(self, u, v):
+        self.G.remove_edge(u, v)
+        self._advance([], [(u, v)], -1)
+        self._repair((u, v))
+
+    def _advance(self, new_nodes, edges, sign):
+        # Apply our own edit to the stored fingerprint; being additive, it still
+        # differs from the graph's if the graph was changed outside the index
+        if 'version' in self.G.graph:
+            self.version = self.G.graph['version']
+        elif isinstance(self.version, tuple) and len(self.version) == 4:
+            n, m, node_sum, edge_sum = self.version
+            self.version = (n + len(new_nodes), m + sign * len(edges),
+                            (node_sum + sum(hash(x) for x in new_nodes)) & _MASK,
+                            (edge_sum + sign * sum(_edge_hash(a, b) for a, b in edges)) & _MASK)
+        else:
+            self.version = None
+
+    def _new_community(self, nodes):
+        cid = self._next_id
+        self._next_id += 1
+        self.members[cid] = set(nodes)
+        for n in nodes:
+            self.node_to_comm[n] = cid
+        return cid
+
+    def _move(self, node, cid):
+        old = self.node_to_comm.get(node)
+        if old is not None:
+            self.members[old].discard(node)
+            if not self.members[old]:
+                del self.members[old]
+        self.members[cid].add(node)
+        self.node_to_comm[node] = cid
+
+    def _local_move(self, node):
+        # Only nodes cut off from their own community move (new nodes, removed edges);
+        # broader drift from the modularity optimum is left to the periodic rebuild
+        counts = Counter(self.node_to_comm[nb] for nb in self.G.neighbors(node))
+        current = self.node_to_comm[node]
+        if counts.get(current, 0) > 0:
+            return
+        if not counts:
+            if len(self.members[current]) > 1:
+                self._move(node, self._new_community(set()))
+            return
+        best, _ = counts.most_common(1)[0]
+        if len(self.members[current]) == 1 or best != current:
+            self._move(node, best)
+
+    def _repair(self, endpoints):
+        self._dirty += 1
+        if self._dirty > self.rebuild_ratio * max(self.G.number_of_edges(), 1):
+            self.rebuild()
+            return
+        for n in endpoints:
+            self._local_move(n)
+
+
 class GraphExplainer:
-    def __init__(self, resolution=1.2):
+    def __init__(self, resolution=1.0):
         self.resolution = resolution
 
+    def community_index(self, G: nx.Graph) -> CommunityIndex:
+        indexes = G.graph.get(_INDEX_KEY)
+        if indexes is None or any(index.G is not G for index in indexes.values()):
+            # G.copy() shares the graph dict shallowly; a copy gets its own indexes
+            indexes = G.graph[_INDEX_KEY] = {}
+        index = indexes.get(self.resolution)
+        if index is None:
+            index = indexes[self.resolution] = CommunityIndex(G, resolution=self.resolution)
+        elif index.is_stale():
+            index.rebuild()
+        return index
+
     def explain(self, G: nx.Graph, node: str):
-        # Placeholder community detection via greedy modularity
-        communities = list(nx.algorithms.community.greedy_modularity_communities(G))
-        node_comm = None
-        for c in communities:
-            if node in c:
-                node_comm = list(c)
-                break
+        index = self.community_index(G)
+        cid = index.community_of(node)
+        node_comm = list(index.members_of(cid)) if cid is not None else None
         neighbors = list(G.neighbors(node))[:5]
         temporal_patterns = {'degree': G.degree(node)}
         gradients = [0.0]*len(neighbors)  # stub
         return {
             'node': node,
+            'community_id': cid,
             'community_members': node_comm,
             'influential_neighbors': neighbors,
             'gradients_stub': gradients,
@@ -0,0 +1,148 @@
+"""Model Export and CPU Serving Runtime
+
+Exports GATFraudDetector, GraphSAGEFraudDetector and TransactionTransformer to
+TorchScript (traced) and, when the `onnx` package is available, ONNX with
+dynamic node / edge / sequence axes. Optional dynamic int8 quantization of the
+linear layers (including PyG `Linear` inside convs) is applied before export.
+
+`load_serving_model` loads an exported artifact with fixed intra-op threads:
+TorchScript via torch.jit, ONNX via onnxruntime when installed.
+"""
+import copy
+import json
+import time
+from pathlib import Path
+
+import torch
+from torch import nn
+
+try:
+    import onnx  # noqa: F401
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+GRAPH_INPUTS = ['x', 'edge_index', 'edge_pairs', 'pair_feats']
+GRAPH_DYNAMIC_AXES = {'x': {0: 'num_nodes'}, 'edge_index': {1: 'num_edges'},
+                      'edge_pairs': {0: 'num_pairs'}, 'pair_feats': {0: 'num_pairs'}, 'logits': {0: 'num_pairs'}}
+SEQUENCE_INPUTS = ['seq']
+SEQUENCE_DYNAMIC_AXES = {'seq': {0: 'seq_len', 1: 'batch'}, 'logits': {0: 'batch'}}
+
+
+def _to_torch_linear(module: nn.Module) -> nn.Module:
+    """Replace torch_geometric Linear layers with nn.Linear so quantize_dynamic picks them up."""
+    for name, child in module.named_children():
+        if type(child).__name__ == 'Linear' and not isinstance(child, nn.Linear) and hasattr(child, 'weight'):
+            lin = nn.Linear(child.in_channels, child.out_channels, bias=child.bias is not None)
+            lin.weight.data.copy_(child.weight.data)
+            if child.bias is not None:
+                lin.bias.data.copy_(child.bias.data)
+            setattr(module, name, lin)
+        else:
+            _to_torch_linear(child)
+    return module
+
+
+def quantize_linear_int8(model: nn.Module) -> nn.Module:
+    """Dynamic int8 quantization of all linear layers (weights int8, activations quantized per batch)."""
+    model = _to_torch_linear(copy.deepcopy(model).eval())
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def _io_spec(example_inputs):
+    if len(example_inputs) == 1:
+        return SEQUENCE_INPUTS, SEQUENCE_DYNAMIC_AXES
+    # pair_feats is optional: GraphSAGE takes it, GAT does not
+    names = GRAPH_INPUTS[:len(example_inputs)]
+    return names, {k: v for k, v in GRAPH_DYNAMIC_AXES.items() if k in names or k == 'logits'}
+
+
+def export_model(model: nn.Module, example_inputs, out_dir, name, formats=('torchscript', 'onnx'),
+                 quantize=False, opset=17):
+    """Export `model` and return {format: path}. Writes `<name>.json` metadata alongside.
+
+    example_inputs: (x, edge_index, edge_pairs[, pair_feats]) for graph models or (seq,) for the transformer.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = quantize_linear_int8(model) if quantize else model.eval()
+    example_inputs = tuple(example_inputs)
+    suffix = '_int8' if quantize else ''
+    artifacts = {}
+    with torch.no_grad():
+        if 'torchscript' in formats:
+            path = out_dir / f'{name}{suffix}.pt'
+            # Traced graphs are shape-polymorphic here: no data-dependent control flow in forward
+            traced = torch.jit.trace(model, example_inputs, check_trace=False)
+            traced.save(str(path))
+            artifacts['torchscript'] = str(path)
+        if 'onnx' in formats:
+            if not ONNX_AVAILABLE:
+                print('onnx not installed; skipping ONNX export')
+            elif quantize:
+                print('Dynamic-quantized modules are not ONNX exportable; skipping ONNX export')
+            else:
+                path = out_dir / f'{name}.onnx'
+                input_names, dynamic_axes = _io_spec(example_inputs)
+                torch.onnx.export(model, example_inputs, str(path), input_names=input_names,
+                                  output_names=['logits'], dynamic_axes=dynamic_axes, opset_version=opset)
+                artifacts['onnx'] = str(path)
+    meta = {
+        'name': name,
+        'model_class': type(model).__name__,
+        'quantized': quantize,
+        'inputs': _io_spec(example_inputs)[0],
+        'artifacts': artifacts,
+        'exported_at': time.time()
+    }
+    with open(out_dir / f'{name}{suffix}.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    return artifacts
+
+
+class ServingModel:
+    """Uniform callable over a TorchScript module or an onnxruntime session."""
+
+    def __init__(self, runner, backend, input_names):
+        self.runner = runner
+        self.backend = backend
+        self.input_names = input_names
+
+    def __call__(self, *inputs):
+        if self.backend == 'onnx':
+            feeds = {n: (t.numpy() if torch.is_tensor(t) else t) for n, t in zip(self.input_names, inputs)}
+            return torch.from_numpy(self.runner.run(['logits'], feeds)[0])
+        with torch.inference_mode():
+            return self.runner(*inputs)
+
+
+def configure_threads(num_threads: int, interop_threads: int = 1):
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError:
+        # Inter-op pool size can only be set before the first parallel region
+        pass
+
+
+def load_serving_model(path, num_threads: int = 4, interop_threads: int = 1) -> ServingModel:
+    """Load a `.pt` (TorchScript) or `.onnx` artifact for CPU inference."""
+    path = str(path)
+    if path.endswith('.onnx'):
+        if not ORT_AVAILABLE:
+            raise ImportError('onnxruntime is required to serve ONNX artifacts')
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = num_threads
+        opts.inter_op_num_threads = interop_threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(path, opts, providers=['CPUExecutionProvider'])
+        return ServingModel(session, 'onnx', [i.name for i in session.get_inputs()])
+    configure_threads(num_threads, interop_threads)
+    module = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.load(path, map_location='cpu').eval()))
+    return ServingModel(module, 'torchscript', None)
@@ -10,8 +10,8 @@ class TransactionTransformer(nn.Module):
         self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         self.cls_head = nn.Linear(feature_dim, 1)
 
-    def forward(self, seq):
-        # seq: (sequence_len, batch, feature_dim)
-        encoded = self.encoder(seq)
+    def forward(self, seq, src_key_padding_mask=None):
+        # seq: (sequence_len, batch, feature_dim); src_key_padding_mask: (batch, sequence_len), True = padding
+        encoded = self.encoder(seq, src_key_padding_mask=src_key_padding_mask)
         cls_token = encoded[0]  # simplistic
         return self.cls_head(cls_token).squeeze(-1)
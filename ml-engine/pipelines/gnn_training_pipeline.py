@@ -9,12 +9,22 @@ Usage (Windows CMD):
 > set DATA_PATH=transactions.csv
 > python ml-engine\pipelines\gnn_training_pipeline.py --data %DATA_PATH% --epochs 20
 
+Training is neighbor-sampled mini-batch by default (--fanouts per layer,
+--batch_size target edges, --num_workers sampler processes), so memory stays
+bounded by the batch subgraph. Pass --full_batch for the original behaviour.
+--export_dir writes TorchScript (and ONNX if installed) artifacts for
+models.export.load_serving_model; --export_int8 adds a quantized variant.
+
 """
 import argparse
-import csv
+import os
+import sys
 import time
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict
+
+import numpy as np
+import pandas as pd
 
 try:
     import torch
@@ -25,9 +35,22 @@ except ImportError as e:
     raise ImportError("Torch / Torch Geometric not installed. Install with: pip install torch torch-geometric (plus torch-scatter/torch-sparse if required).") from e
 from typing import Any, Dict, Tuple
 
+GRAPH_ENGINE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'graph-engine'))
+if GRAPH_ENGINE_ROOT not in sys.path:
+    sys.path.insert(0, GRAPH_ENGINE_ROOT)
+ML_ENGINE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ML_ENGINE_ROOT not in sys.path:
+    sys.path.insert(0, ML_ENGINE_ROOT)
+
+from compact_graph import NodeIdMap  # noqa: E402
+from features.node_features import cached_node_features, edge_fraud_prior, PAIR_FEATURE_NAMES  # noqa: E402
+from models.export import export_model  # noqa: E402
+from neighbor_sampler import edge_batch_loader  # noqa: E402
+
 
 class GraphSAGEFraudDetector(nn.Module):
-    def __init__(self, in_dim: int = 32, hidden_dim: int = 64, num_layers: int = 2):
+    def __init__(self, in_dim: int = 32, hidden_dim: int = 64, num_layers: int = 2,
+                 pair_dim: int = len(PAIR_FEATURE_NAMES)):
         super().__init__()
         self.convs = nn.ModuleList()
         last_dim = in_dim
@@ -35,123 +58,249 @@ class GraphSAGEFraudDetector(nn.Module):
             conv = SAGEConv(last_dim, hidden_dim)
             self.convs.append(conv)
             last_dim = hidden_dim
-        self.head = nn.Linear(last_dim * 2, 1)
+        self.head = nn.Linear(last_dim * 2 + pair_dim, 1)
 
-    def forward(self, x, edge_index, edge_pairs):
+    def forward(self, x, edge_index, edge_pairs, pair_feats):
         for conv in self.convs:
             x = conv(x, edge_index).relu()
         src = x[edge_pairs[:, 0]]
         dst = x[edge_pairs[:, 1]]
-        edge_repr = torch.cat([src, dst], dim=1)
+        edge_repr = torch.cat([src, dst, pair_feats], dim=1)
         logits = self.head(edge_repr).squeeze(-1)
         return logits
 
 
-def build_graph(transactions) -> Tuple[Data, torch.Tensor, torch.Tensor]:
-    id_map: Dict[Any, int] = {}
-    edges = []
-    labels = []
-    for t in transactions:
-        u = t['user_id']
-        m = t['merchant_id']
-        if u not in id_map:
-            id_map[u] = len(id_map)
-        if m not in id_map:
-            id_map[m] = len(id_map)
-        uid = id_map[u]
-        mid = id_map[m]
-        edges.append([uid, mid])
-        labels.append(t.get('label', 0))
-    edge_index = torch.tensor(edges, dtype=torch.long).t().contiguous()
-    num_nodes = len(id_map)
-    x = torch.randn((num_nodes, 32))  # Placeholder: replace with real engineered features
-    data = Data(x=x, edge_index=edge_index)
+def build_graph(transactions, label_mask=None, cache_dir=None) -> Tuple[Data, torch.Tensor, torch.Tensor]:
+    """Build the PyG graph from `load_transactions` columns (no per-row Python objects).
+
+    Node features come from graph-engine/features/node_features.py; only labels
+    selected by `label_mask` feed the fraud-rate prior, which is a per-edge
+    leave-one-out pair feature (`data.pair_feats`, aligned with edge_pairs).
+    """
+    edge_index = torch.from_numpy(transactions['edges'])
+    num_nodes = transactions['num_nodes']
+    feats = cached_node_features(
+        cache_dir, transactions['edges'][0], transactions['edges'][1], num_nodes,
+        amount=transactions['amount'], timestamp=transactions['timestamp'],
+        label=transactions['label'], label_mask=label_mask
+    )
+    x = torch.from_numpy(feats)
+    data = Data(x=x, edge_index=edge_index, num_nodes=num_nodes)
+    data.pair_feats = torch.from_numpy(edge_fraud_prior(
+        transactions['edges'][0], transactions['edges'][1], num_nodes, transactions['label'], label_mask))
     edge_pairs = edge_index.t()
-    return data, edge_pairs, torch.tensor(labels, dtype=torch.float32)
+    return data, edge_pairs, torch.from_numpy(transactions['label'].astype(np.float32))
 
 
-def load_transactions(path: Path) -> List[Dict]:
-    rows = []
-    with path.open('r', newline='') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            # Normalize / cast
-            rows.append({
-                'user_id': r['user_id'],
-                'merchant_id': r['merchant_id'],
-                'label': int(r.get('label', 0))
-            })
-    return rows
+def _count_rows(path: Path, block_size: int = 1 << 24) -> int:
+    # Data rows = newline count minus header (plus an unterminated last line)
+    lines, last = 0, b'\n'
+    with path.open('rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
 
 
-def split_edges(edge_pairs, labels, train_ratio=0.8):
-    total = edge_pairs.shape[0]
+def _to_epoch_seconds(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(col):
+        return col.to_numpy(dtype=np.int64)
+    return pd.to_datetime(col, utc=True).astype('int64').to_numpy() // 10**9
+
+
+def load_transactions(path: Path, chunksize: int = 1_000_000) -> Dict[str, Any]:
+    """Chunked columnar CSV ingestion.
+
+    user_id/merchant_id values share one node-id space (as before) and are
+    interned through compact_graph.NodeIdMap (collision-checked 64-bit hashes). Edges are written
+    into a preallocated (2, rows) int64 array that build_graph wraps without
+    copying; amount/timestamp are kept when present for feature building.
+    """
+    n_rows = _count_rows(path)
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = ['user_id', 'merchant_id'] + [c for c in ('label', 'amount', 'timestamp') if c in header]
+    edges = np.empty((2, n_rows), dtype=np.int64)
+    label = np.zeros(n_rows, dtype=np.int8)
+    amount = np.zeros(n_rows, dtype=np.float32) if 'amount' in header else None
+    timestamp = np.zeros(n_rows, dtype=np.int64) if 'timestamp' in header else None
+    table = NodeIdMap()
+
+    row = 0
+    reader = pd.read_csv(path, usecols=wanted, dtype={'user_id': str, 'merchant_id': str}, chunksize=chunksize)
+    for chunk in reader:
+        n = len(chunk)
+        if row + n > n_rows:
+            raise ValueError(f'{path} has more rows than counted ({n_rows}); quoted newlines are not supported')
+        # Interleave user/merchant so first-seen order matches row order (u0, m0, u1, m1, ...)
+        raw = np.empty(2 * n, dtype=object)
+        raw[0::2] = chunk['user_id'].to_numpy()
+        raw[1::2] = chunk['merchant_id'].to_numpy()
+        ids = table.intern(raw)
+        edges[0, row:row + n] = ids[0::2]
+        edges[1, row:row + n] = ids[1::2]
+        if 'label' in chunk:
+            label[row:row + n] = chunk['label'].fillna(0).to_numpy(dtype=np.int8)
+        if amount is not None:
+            amount[row:row + n] = chunk['amount'].to_numpy(dtype=np.float32)
+        if timestamp is not None:
+            timestamp[row:row + n] = _to_epoch_seconds(chunk['timestamp'])
+        row += n
+
+    return {
+        'edges': edges[:, :row],
+        'label': label[:row],
+        'amount': amount[:row] if amount is not None else None,
+        'timestamp': timestamp[:row] if timestamp is not None else None,
+        'num_nodes': len(table)
+    }
+
+
+def split_edge_ids(total, train_ratio=0.8):
     train_size = int(total * train_ratio)
     indices = torch.randperm(total)
-    train_idx = indices[:train_size]
-    val_idx = indices[train_size:]
+    return indices[:train_size], indices[train_size:]
+
+
+def split_edges(edge_pairs, labels, train_ratio=0.8):
+    train_idx, val_idx = split_edge_ids(edge_pairs.shape[0], train_ratio)
     return edge_pairs[train_idx], labels[train_idx], edge_pairs[val_idx], labels[val_idx]
 
 
+def train_minibatch(model, data, train_pairs, train_feats, train_labels, fanouts, epochs=10, batch_size=1024,
+                    num_workers=0, lr=1e-3):
+    loader = edge_batch_loader(data.x, data.edge_index, train_pairs, train_labels, fanouts,
+                               batch_size=batch_size, num_workers=num_workers, shuffle=True,
+                               pair_feats=train_feats)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    criterion = torch.nn.BCEWithLogitsLoss()
+    model.train()
+    for epoch in range(1, epochs + 1):
+        total_loss, correct, seen = 0.0, 0.0, 0
+        for batch in loader:
+            optimizer.zero_grad()
+            logits = model(batch['x'], batch['edge_index'], batch['pairs'], batch['pair_feats'])
+            loss = criterion(logits, batch['labels'].float())
+            loss.backward()
+            optimizer.step()
+            n = batch['labels'].shape[0]
+            total_loss += loss.item() * n
+            correct += ((logits.detach().sigmoid() > 0.5).float() == batch['labels']).sum().item()
+            seen += n
+        if epoch % 2 == 0:
+            print(f"[Epoch {epoch}] train_loss={total_loss / seen:.4f} train_acc={correct / seen:.4f}")
+
+
+@torch.no_grad()
+def predict_minibatch(model, data, pairs, pair_feats, fanouts, batch_size=4096, num_workers=0):
+    loader = edge_batch_loader(data.x, data.edge_index, pairs, torch.zeros(pairs.shape[0]), fanouts,
+                               batch_size=batch_size, num_workers=num_workers, shuffle=False,
+                               pair_feats=pair_feats)
+    model.eval()
+    return torch.cat([model(b['x'], b['edge_index'], b['pairs'], b['pair_feats']) for b in loader])
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--data', required=True, help='Path to transactions CSV')
     parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='CSV rows per ingestion chunk')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--feature_cache', default='graph_outputs/feature_cache', help='Node feature cache dir')
+    parser.add_argument('--full_batch', action='store_true', help='Train on the whole graph each epoch')
+    parser.add_argument('--fanouts', type=int, nargs='+', default=[10, 5], help='Sampled neighbors per hop')
+    parser.add_argument('--batch_size', type=int, default=1024, help='Target edges per mini-batch')
+    parser.add_argument('--num_workers', type=int, default=2, help='Sampler worker processes')
+    parser.add_argument('--export_dir', default=None, help='Also export TorchScript/ONNX serving artifacts here')
+    parser.add_argument('--export_int8', action='store_true', help='Add a dynamic int8 quantized TorchScript export')
     args = parser.parse_args()
 
     data_path = Path(args.data)
     if not data_path.exists():
         raise FileNotFoundError(f'Dataset not found: {data_path}')
 
-    transactions = load_transactions(data_path)
-    pyg_data, edge_pairs, labels = build_graph(transactions)
-    train_pairs, train_labels, val_pairs, val_labels = split_edges(edge_pairs, labels)
+    torch.manual_seed(args.seed)
+    transactions = load_transactions(data_path, chunksize=args.chunksize)
+    train_idx, val_idx = split_edge_ids(transactions['edges'].shape[1])
+    label_mask = np.zeros(transactions['edges'].shape[1], dtype=bool)
+    label_mask[train_idx.numpy()] = True
+    pyg_data, edge_pairs, labels = build_graph(transactions, label_mask=label_mask, cache_dir=args.feature_cache)
+    train_pairs, train_labels = edge_pairs[train_idx], labels[train_idx]
+    val_pairs, val_labels = edge_pairs[val_idx], labels[val_idx]
+    train_feats, val_feats = pyg_data.pair_feats[train_idx], pyg_data.pair_feats[val_idx]
 
-    model = GraphSAGEFraudDetector()
+    model = GraphSAGEFraudDetector(in_dim=pyg_data.x.shape[1], num_layers=len(args.fanouts))
 
     # Train
     start_train = time.time()
-    model.train()
-    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
-    criterion = torch.nn.BCEWithLogitsLoss()
+    if args.full_batch:
+        model.train()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+        criterion = torch.nn.BCEWithLogitsLoss()
 
-    for epoch in range(1, args.epochs + 1):
-        optimizer.zero_grad()
-        logits = model(pyg_data.x, pyg_data.edge_index, train_pairs)
-        loss = criterion(logits, train_labels.float())
-        loss.backward()
-        optimizer.step()
-        with torch.no_grad():
-            preds = (logits.sigmoid() > 0.5).float()
-            acc = (preds == train_labels).float().mean().item()
-        if epoch % 2 == 0:
-            print(f"[Epoch {epoch}] train_loss={loss.item():.4f} train_acc={acc:.4f}")
+        for epoch in range(1, args.epochs + 1):
+            optimizer.zero_grad()
+            logits = model(pyg_data.x, pyg_data.edge_index, train_pairs, train_feats)
+            loss = criterion(logits, train_labels.float())
+            loss.backward()
+            optimizer.step()
+            with torch.no_grad():
+                preds = (logits.sigmoid() > 0.5).float()
+                acc = (preds == train_labels).float().mean().item()
+            if epoch % 2 == 0:
+                print(f"[Epoch {epoch}] train_loss={loss.item():.4f} train_acc={acc:.4f}")
+    else:
+        train_minibatch(model, pyg_data, train_pairs, train_feats, train_labels, args.fanouts, epochs=args.epochs,
+                        batch_size=args.batch_size, num_workers=args.num_workers)
 
     train_time = time.time() - start_train
 
     # Validate
     model.eval()
     with torch.no_grad():
-        val_logits = model(pyg_data.x, pyg_data.edge_index, val_pairs)
+        if args.full_batch:
+            val_logits = model(pyg_data.x, pyg_data.edge_index, val_pairs, val_feats)
+        else:
+            val_logits = predict_minibatch(model, pyg_data, val_pairs, val_feats, args.fanouts,
+                                           num_workers=args.num_workers)
         val_preds = (val_logits.sigmoid() > 0.5).float()
         val_acc = (val_preds == val_labels).float().mean().item()
 
-    # Latency measurement (single inference batch)
+    # Latency measurement (validation set, same inference path as above)
     start_inf = time.time()
-    _ = model(pyg_data.x, pyg_data.edge_index, val_pairs)
+    with torch.no_grad():
+        if args.full_batch:
+            _ = model(pyg_data.x, pyg_data.edge_index, val_pairs, val_feats)
+        else:
+            _ = predict_minibatch(model, pyg_data, val_pairs, val_feats, args.fanouts,
+                                  num_workers=args.num_workers)
     latency_ms = (time.time() - start_inf) * 1000
 
     print({
         'train_time_sec': train_time,
         'validation_accuracy': val_acc,
         'inference_latency_ms': latency_ms,
-        'num_edges_total': int(edge_pairs.shape[0])
+        'num_edges_total': int(edge_pairs.shape[0]),
+        'num_nodes': int(transactions['num_nodes'])
     })
 
     # Save model
     torch.save(model.state_dict(), 'gnn_fraud_detector.pt')
     print('Model saved to gnn_fraud_detector.pt')
 
+    if args.export_dir:
+        # Small real subgraph as the trace example; exported graphs accept any node / edge count
+        example = (pyg_data.x, pyg_data.edge_index[:, :1024], val_pairs[:64], val_feats[:64])
+        artifacts = export_model(model, example, args.export_dir, 'gnn_fraud_detector')
+        if args.export_int8:
+            artifacts.update({f'{k}_int8': v for k, v in export_model(
+                model, example, args.export_dir, 'gnn_fraud_detector', formats=('torchscript',), quantize=True).items()})
+        print(f'Exported serving artifacts: {artifacts}')
+
 
 if __name__ == '__main__':
     main()
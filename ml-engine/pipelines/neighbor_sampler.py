@@ -0,0 +1,134 @@
+"""Neighbor Sampling for Mini-batch GNN Training
+
+Samples a bounded computation subgraph around a batch of target edges:
+at hop i from the edge endpoints, up to `fanouts[i]` incoming neighbors of
+the current frontier (the direction SAGEConv aggregates along edge_index:
+src -> dst). Use one fanout per conv layer.
+Subgraph size is at most batch_size * 2 * prod(fanouts) nodes, independent of
+total graph size.
+
+`EdgeBatchDataset` plugs into a torch DataLoader so sampling and feature
+gathering run in CPU worker processes.
+"""
+import numpy as np
+import torch
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
+
+from utils.arrays import ragged_positions
+
+
+class NeighborSampler:
+    def __init__(self, edge_index, num_nodes, fanouts, seed=42):
+        src = np.asarray(edge_index[0], dtype=np.int64)
+        dst = np.asarray(edge_index[1], dtype=np.int64)
+        # In-neighbor CSR keyed by destination
+        order = np.argsort(dst, kind='stable')
+        self.indices = src[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(dst, minlength=num_nodes))]).astype(np.int64)
+        self.num_nodes = num_nodes
+        self.fanouts = list(fanouts)
+        self.rng = np.random.default_rng(seed)
+        self._local = None
+
+    def reseed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def _sample_in_neighbors(self, frontier, fanout):
+        starts = self.indptr[frontier]
+        deg = self.indptr[frontier + 1] - starts
+        full = deg <= fanout
+        # Low-degree nodes keep every in-edge
+        pos_full = ragged_positions(starts[full], deg[full])
+        dst_full = np.repeat(frontier[full], deg[full])
+        # High-degree nodes draw `fanout` in-edges (with replacement, deduplicated below)
+        hub = ~full
+        n_hub = int(hub.sum())
+        offs = (self.rng.random((n_hub, fanout)) * deg[hub, None]).astype(np.int64)
+        pos_hub = (starts[hub, None] + offs).ravel()
+        dst_hub = np.repeat(frontier[hub], fanout)
+        pos = np.concatenate([pos_full, pos_hub])
+        dst = np.concatenate([dst_full, dst_hub])
+        if n_hub:
+            pos, keep = np.unique(pos, return_index=True)
+            dst = dst[keep]
+        return self.indices[pos], dst
+
+    def sample(self, seeds):
+        """Return (node_ids, local edge_index, local index of each seed)."""
+        seeds = np.asarray(seeds, dtype=np.int64)
+        if self._local is None:
+            # Reused global->local map; only touched entries are reset after each batch
+            self._local = np.full(self.num_nodes, -1, dtype=np.int64)
+        local = self._local
+        nodes = np.unique(seeds)
+        local[nodes] = np.arange(nodes.size)
+        node_chunks = [nodes]
+        n_local = nodes.size
+        frontier = nodes
+        e_src, e_dst = [], []
+        for fanout in self.fanouts:
+            if frontier.size == 0:
+                break
+            nbr, dst = self._sample_in_neighbors(frontier, fanout)
+            new = np.unique(nbr[local[nbr] < 0])
+            local[new] = np.arange(n_local, n_local + new.size)
+            n_local += new.size
+            node_chunks.append(new)
+            e_src.append(local[nbr])
+            e_dst.append(local[dst])
+            frontier = new
+        node_ids = np.concatenate(node_chunks)
+        edge_index = np.stack([np.concatenate(e_src), np.concatenate(e_dst)]) if e_src else np.empty((2, 0), np.int64)
+        seed_local = local[seeds]
+        local[node_ids] = -1
+        return node_ids, edge_index, seed_local
+
+
+class EdgeBatchDataset(Dataset):
+    """Indexed by lists of target-edge ids (use with a BatchSampler)."""
+
+    def __init__(self, x, edge_pairs, labels, sampler: NeighborSampler, pair_feats=None):
+        self.x = x
+        self.edge_pairs = edge_pairs.numpy() if torch.is_tensor(edge_pairs) else np.asarray(edge_pairs)
+        self.labels = labels
+        self.sampler = sampler
+        self.pair_feats = pair_feats  # optional per-target-edge features, aligned with edge_pairs
+
+    def __len__(self):
+        return self.edge_pairs.shape[0]
+
+    def __getitem__(self, edge_ids):
+        edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        pairs = self.edge_pairs[edge_ids]
+        node_ids, edge_index, seed_local = self.sampler.sample(pairs.reshape(-1))
+        node_ids_t = torch.from_numpy(node_ids)
+        batch = {
+            'x': self.x[node_ids_t],
+            'edge_index': torch.from_numpy(edge_index),
+            'pairs': torch.from_numpy(seed_local.reshape(-1, 2)),
+            'labels': self.labels[torch.from_numpy(edge_ids)],
+            'node_ids': node_ids_t
+        }
+        if self.pair_feats is not None:
+            batch['pair_feats'] = self.pair_feats[torch.from_numpy(edge_ids)]
+        return batch
+
+
+def _worker_init(worker_id):
+    info = torch.utils.data.get_worker_info()
+    info.dataset.sampler.reseed(info.seed % (2 ** 32))
+
+
+def edge_batch_loader(x, edge_index, edge_pairs, labels, fanouts, batch_size=1024,
+                      num_workers=0, shuffle=True, seed=42, pair_feats=None):
+    sampler = NeighborSampler(edge_index, x.shape[0], fanouts, seed=seed)
+    dataset = EdgeBatchDataset(x, edge_pairs, labels, sampler, pair_feats)
+    order = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(
+        dataset,
+        sampler=BatchSampler(order, batch_size=batch_size, drop_last=False),
+        batch_size=None,
+        num_workers=num_workers,
+        worker_init_fn=_worker_init if num_workers > 0 else None,
+        persistent_workers=num_workers > 0
+    )
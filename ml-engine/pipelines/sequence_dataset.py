@@ -0,0 +1,227 @@
+"""Per-user Transaction Sequences for TransactionTransformer
+
+Builds, for every transaction, the user's last-N transaction sequence from a
+raw split (data/raw/<name>/{train,valid,test}.csv) without materializing the
+windows: rows are sorted by (user, timestamp) once and each sample is a
+(start, length) slice of the sorted feature matrix.
+
+Sequence layout matches TransactionTransformer (seq_len, batch, dim) with the
+scored transaction at position 0 (the model's CLS output) followed by its
+history newest-first; shorter sequences are right-padded and masked through
+`src_key_padding_mask`. `LengthBucketSampler` groups similar lengths into a
+batch to minimize padding.
+
+`UserSequenceCache` keeps a ring buffer of encoded history per user so online
+scoring appends one step instead of rebuilding the sequence.
+"""
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from utils.arrays import ragged_positions
+
+FEATURE_DIM = 32
+HASH_BUCKETS = 8
+CATEGORICAL_COLUMNS = ('channel', 'currency', 'merchant_id')
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    ts = pd.to_datetime(pd.Series(values), utc=True, errors='coerce')
+    return (ts.astype('int64') // 10**9).to_numpy()
+
+
+def encode_transactions(amount, timestamp, prev_timestamp, categoricals, feature_dim=FEATURE_DIM) -> np.ndarray:
+    """Vectorized per-transaction features (float32, `feature_dim` wide).
+
+    amount / timestamp / prev_timestamp: 1-D arrays (epoch seconds; prev < 0 means no history).
+    categoricals: dict column -> 1-D array of raw values, hashed into HASH_BUCKETS one-hot slots.
+    """
+    n = len(amount)
+    feats = np.zeros((n, feature_dim), dtype=np.float32)
+    timestamp = np.asarray(timestamp, dtype=np.int64)
+    prev_timestamp = np.asarray(prev_timestamp, dtype=np.int64)
+    has_prev = prev_timestamp >= 0
+    feats[:, 0] = np.log1p(np.maximum(np.asarray(amount, dtype=np.float64), 0))
+    feats[:, 1] = np.where(has_prev, np.log1p(np.maximum(timestamp - prev_timestamp, 0) / 3600.0), 0)
+    feats[:, 2] = ~has_prev
+    hour = (timestamp % 86400) / 86400.0 * 2 * np.pi
+    dow = ((timestamp // 86400 + 3) % 7) / 7.0 * 2 * np.pi  # epoch day 0 was a Thursday
+    feats[:, 3], feats[:, 4] = np.sin(hour), np.cos(hour)
+    feats[:, 5], feats[:, 6] = np.sin(dow), np.cos(dow)
+    offset = 8
+    rows = np.arange(n)
+    for col in CATEGORICAL_COLUMNS:
+        if offset + HASH_BUCKETS > feature_dim:
+            break
+        values = categoricals.get(col)
+        if values is not None:
+            bucket = pd.util.hash_array(np.asarray(values, dtype=object)) % HASH_BUCKETS
+            feats[rows, offset + bucket.astype(np.int64)] = 1.0
+        offset += HASH_BUCKETS
+    return feats
+
+
+class TransactionSequenceDataset(Dataset):
+    """Indexed by lists of transaction positions (use with LengthBucketSampler)."""
+
+    def __init__(self, features, labels, seq_start, seq_len, row_order, users, timestamps):
+        self.features = features      # (n, dim), sorted by (user, timestamp)
+        self.labels = labels          # aligned with features
+        self.seq_start = seq_start    # oldest row of each sample's window
+        self.seq_len = seq_len        # window length including the scored row
+        self.row_order = row_order    # original CSV row of each sorted position
+        self.users = users            # raw user id of each sorted position
+        self.timestamps = timestamps  # epoch seconds of each sorted position
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, user_col='account_id', max_len=32, feature_dim=FEATURE_DIM):
+        ts = _epoch_seconds(df['timestamp'])
+        raw_users = df[user_col].to_numpy(dtype=object)
+        user_hash = pd.util.hash_array(raw_users)
+        order = np.lexsort((ts, user_hash))
+        user_hash, ts = user_hash[order], ts[order]
+        n = len(order)
+        new_user = np.ones(n, dtype=bool)
+        new_user[1:] = user_hash[1:] != user_hash[:-1]
+        group_start = np.maximum.accumulate(np.where(new_user, np.arange(n), 0))
+        prev_ts = np.where(new_user, -1, np.concatenate([[-1], ts[:-1]]))
+        categoricals = {c: df[c].to_numpy(dtype=object)[order] for c in CATEGORICAL_COLUMNS if c in df.columns}
+        features = encode_transactions(df['amount'].to_numpy()[order], ts, prev_ts, categoricals, feature_dim)
+        pos = np.arange(n)
+        seq_start = np.maximum(group_start, pos - max_len + 1)
+        labels = df['label'].to_numpy()[order].astype(np.float32) if 'label' in df.columns else np.zeros(n, np.float32)
+        return cls(torch.from_numpy(features), torch.from_numpy(labels), seq_start, pos - seq_start + 1, order,
+                   raw_users[order], ts)
+
+    @classmethod
+    def from_csv(cls, path, user_col='account_id', max_len=32, feature_dim=FEATURE_DIM):
+        return cls.from_frame(pd.read_csv(path), user_col=user_col, max_len=max_len, feature_dim=feature_dim)
+
+    def __len__(self):
+        return len(self.seq_len)
+
+    def __getitem__(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        lens = self.seq_len[ids]
+        max_len = int(lens.max())
+        # Newest-first gather: position 0 is the scored transaction itself
+        ends = self.seq_start[ids] + lens - 1
+        batch_col = np.repeat(np.arange(len(ids)), lens)
+        step = ragged_positions(np.zeros(len(ids), dtype=np.int64), lens)
+        src_rows = np.repeat(ends, lens) - step
+        seq = torch.zeros((max_len, len(ids), self.features.shape[1]), dtype=self.features.dtype)
+        seq[torch.from_numpy(step), torch.from_numpy(batch_col)] = self.features[torch.from_numpy(src_rows)]
+        padding_mask = torch.from_numpy(np.arange(max_len)[None, :] >= lens[:, None])
+        return {
+            'seq': seq,
+            'padding_mask': padding_mask,
+            'labels': self.labels[torch.from_numpy(ids)],
+            'row_ids': torch.from_numpy(self.row_order[ids])
+        }
+
+
+class LengthBucketSampler:
+    """Yields index batches of similar sequence length.
+
+    With shuffle, indices are shuffled, sorted by length inside pools of
+    `pool_batches` batches, and the resulting batches are emitted in random order.
+    """
+
+    def __init__(self, lengths, batch_size=256, shuffle=True, pool_batches=50, seed=42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.pool = batch_size * pool_batches
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        if self.shuffle:
+            idx = self.rng.permutation(len(self.lengths))
+            pools = [idx[i:i + self.pool] for i in range(0, len(idx), self.pool)]
+            idx = np.concatenate([p[np.argsort(self.lengths[p], kind='stable')] for p in pools])
+        else:
+            idx = np.argsort(self.lengths, kind='stable')
+        batches = [idx[i:i + self.batch_size] for i in range(0, len(idx), self.batch_size)]
+        if self.shuffle:
+            batches = [batches[i] for i in self.rng.permutation(len(batches))]
+        for b in batches:
+            yield b.tolist()
+
+
+def sequence_loader(dataset: TransactionSequenceDataset, batch_size=256, shuffle=True, num_workers=0, seed=42):
+    return DataLoader(
+        dataset,
+        sampler=LengthBucketSampler(dataset.seq_len, batch_size=batch_size, shuffle=shuffle, seed=seed),
+        batch_size=None,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0
+    )
+
+
+class UserSequenceCache:
+    """Ring buffer of the last `max_len - 1` encoded transactions per user."""
+
+    def __init__(self, max_len=32, feature_dim=FEATURE_DIM):
+        self.history = max_len - 1
+        self.feature_dim = feature_dim
+        self._buf = {}
+        self._count = {}
+        self._last_ts = {}
+
+    def encode(self, amount, timestamp, categoricals, users):
+        prev = np.array([self._last_ts.get(u, -1) for u in users], dtype=np.int64)
+        return encode_transactions(amount, timestamp, prev, categoricals, self.feature_dim)
+
+    def append(self, user, features, timestamp):
+        buf = self._buf.get(user)
+        if buf is None:
+            buf = self._buf[user] = np.zeros((self.history, self.feature_dim), dtype=np.float32)
+            self._count[user] = 0
+        buf[self._count[user] % self.history] = features
+        self._count[user] += 1
+        self._last_ts[user] = int(timestamp)
+
+    def history_of(self, user) -> np.ndarray:
+        """Cached history newest-first, shape (<= max_len - 1, dim)."""
+        count = self._count.get(user, 0)
+        if count == 0:
+            return np.empty((0, self.feature_dim), dtype=np.float32)
+        n = min(count, self.history)
+        slots = (count - 1 - np.arange(n)) % self.history
+        return self._buf[user][slots]
+
+    def warm(self, dataset: TransactionSequenceDataset):
+        """Seed every user's buffer with their most recent rows from a dataset."""
+        users = dataset.users
+        last = np.ones(len(users), dtype=bool)
+        last[:-1] = users[1:] != users[:-1]
+        for pos in np.flatnonzero(last):
+            # seq_start never crosses into the previous user's rows
+            start = max(int(dataset.seq_start[pos]), pos - self.history + 1)
+            rows = dataset.features[start:pos + 1].numpy()
+            buf = self._buf[users[pos]] = np.zeros((self.history, self.feature_dim), dtype=np.float32)
+            buf[:len(rows)] = rows
+            self._count[users[pos]] = len(rows)
+            self._last_ts[users[pos]] = int(dataset.timestamps[pos])
+
+    @torch.no_grad()
+    def score(self, model, users, amount, timestamp, categoricals=None, update=True) -> np.ndarray:
+        """Score a batch of new transactions against cached history, then append them."""
+        timestamp = np.asarray(timestamp, dtype=np.int64)
+        new = self.encode(amount, timestamp, categoricals or {}, users)
+        histories = [self.history_of(u) for u in users]
+        lens = np.array([h.shape[0] + 1 for h in histories])
+        seq = np.zeros((int(lens.max()), len(users), self.feature_dim), dtype=np.float32)
+        seq[0] = new
+        for b, h in enumerate(histories):
+            seq[1:1 + h.shape[0], b] = h
+        padding_mask = torch.from_numpy(np.arange(seq.shape[0])[None, :] >= lens[:, None])
+        probs = model(torch.from_numpy(seq), src_key_padding_mask=padding_mask).sigmoid().numpy()
+        if update:
+            for b, u in enumerate(users):
+                self.append(u, new[b], timestamp[b])
+        return probs
@@ -0,0 +1,53 @@
+"""Similar Historical Fraud Case Index
+
+Stores feature vectors of labeled fraud cases in a VectorIndex and returns the
+top-k most similar past frauds for new transactions. Features are expected to
+be on the same (scaled) feature space the detectors are trained on.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.vector_index import VectorIndex
+
+
+class FraudCaseIndex:
+    def __init__(self, metric='cosine', mode='exact', **index_kwargs):
+        self.index = VectorIndex(metric=metric, mode=mode, **index_kwargs)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add_cases(self, features, case_ids=None, labels=None):
+        """Append cases; when `labels` is given only rows labeled fraud (1) are kept, and
+        without `case_ids` each case is identified by its row in `features`."""
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if case_ids is not None:
+            case_ids = np.asarray(case_ids)
+        if labels is not None:
+            fraud = np.asarray(labels).astype(bool)
+            features = features[fraud]
+            case_ids = case_ids[fraud] if case_ids is not None else np.flatnonzero(fraud)
+        if len(features):
+            self.index.add(features, ids=case_ids)
+        return len(features)
+
+    def query(self, features, k=5):
+        """Per input row, a list of {'case_id', 'similarity' | 'distance'} best first."""
+        if len(self.index) == 0:
+            return [[] for _ in range(np.atleast_2d(features).shape[0])]
+        ids, scores = self.index.search(np.asarray(features, dtype=np.float32), k=k)
+        key = 'similarity' if self.index.metric == 'cosine' else 'distance'
+        return [[{'case_id': cid, key: float(s)} for cid, s in zip(row_ids.tolist(), row_scores.tolist())]
+                for row_ids, row_scores in zip(ids, scores)]
+
+    def save(self, path):
+        return self.index.save(Path(path))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        case_index = cls.__new__(cls)
+        case_index.index = VectorIndex.load(Path(path), mmap=mmap)
+        return case_index
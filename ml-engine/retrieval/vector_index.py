@@ -0,0 +1,314 @@
+"""Nearest-Neighbor Vector Index (float32)
+
+Exact mode scans the matrix in fixed-size blocks and merges per-block top-k;
+IVF mode clusters vectors with a few k-means rounds and only scans the
+`nprobe` closest inverted lists at query time.
+Metrics: 'cosine' (higher is more similar) and 'l2' (lower is closer).
+
+Rows live in two segments: an immutable base (optionally memory-mapped from
+disk by `load`) and an in-memory tail that `add` appends to with amortized
+growth. `save` compacts both into a single base on disk.
+
+Ids are kept as int64 while every id is an integer and as fixed-width unicode
+strings otherwise (mixed ids become strings, e.g. 1 -> '1'), so both segments
+share one dtype and `np.save` never needs pickling.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+def _top_k(scores, k, largest=True):
+    # Row-wise top-k indices of a 2D score matrix, sorted best first
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    keyed = -scores if largest else scores
+    part = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(keyed, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _as_ids(ids) -> np.ndarray:
+    ids = np.asarray(ids)
+    if ids.dtype.kind in 'iu':
+        return ids.astype(np.int64)
+    if ids.dtype.kind == 'U':
+        return ids
+    return np.array([str(i) for i in ids.ravel().tolist()], dtype=str).reshape(ids.shape)
+
+
+def _append_rows(buf, n, new):
+    # Write `new` after the first n rows of buf, doubling capacity when full
+    if buf is None or n + len(new) > len(buf) or buf.dtype != np.result_type(buf.dtype, new.dtype):
+        dtype = new.dtype if buf is None else np.result_type(buf.dtype, new.dtype)
+        grown = np.empty((max(16, 2 * (n + len(new))),) + new.shape[1:], dtype=dtype)
+        if buf is not None:
+            grown[:n] = buf[:n]
+        buf = grown
+    buf[n:n + len(new)] = new
+    return buf
+
+
+class VectorIndex:
+    def __init__(self, metric='cosine', mode='exact', nlist=None, nprobe=8,
+                 block_size=65536, kmeans_iters=10, seed=42):
+        if metric not in ('cosine', 'l2'):
+            raise ValueError(f"Unsupported metric: {metric}")
+        if mode not in ('exact', 'ivf'):
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.metric = metric
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.block_size = block_size
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self.centroids = None
+        self._reset()
+
+    def _reset(self):
+        self._base = np.empty((0, 0), dtype=np.float32)
+        self._base_sq = np.empty(0, dtype=np.float32)
+        self._base_ids = np.empty(0, dtype=np.int64)
+        self._base_assign = np.empty(0, dtype=np.int64)
+        self.list_offsets = None
+        self.list_members = None
+        self._tail = None
+        self._tail_sq = None
+        self._tail_ids = None
+        self._tail_assign = None
+        self._tail_n = 0
+
+    def __len__(self):
+        return self._base.shape[0] + self._tail_n
+
+    def _prepare(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.metric == 'cosine':
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def build(self, vectors, ids=None):
+        self._reset()
+        self._base = self._prepare(vectors)
+        n = self._base.shape[0]
+        self._base_ids = np.arange(n) if ids is None else _as_ids(ids)
+        self._base_sq = np.einsum('ij,ij->i', self._base, self._base)
+        if self.mode == 'ivf':
+            self._train_ivf()
+        return self
+
+    def add(self, vectors, ids=None):
+        """Append rows without touching the base segment."""
+        vectors = self._prepare(vectors)
+        if len(self) == 0 and self.centroids is None:
+            return self.build(vectors, ids)
+        ids = np.arange(len(self), len(self) + len(vectors)) if ids is None else _as_ids(ids)
+        if ids.dtype.kind != self._base_ids.dtype.kind or (
+                self._tail_ids is not None and ids.dtype.kind != self._tail_ids.dtype.kind):
+            # Integer and string ids meet: keep every id as a string
+            ids = ids.astype(str)
+            self._base_ids = self._base_ids.astype(str)
+            if self._tail_ids is not None:
+                self._tail_ids = self._tail_ids.astype(str)
+        n = self._tail_n
+        self._tail = _append_rows(self._tail, n, vectors)
+        self._tail_sq = _append_rows(self._tail_sq, n, np.einsum('ij,ij->i', vectors, vectors))
+        self._tail_ids = _append_rows(self._tail_ids, n, ids)
+        if self.centroids is not None:
+            self._tail_assign = _append_rows(self._tail_assign, n, self._nearest_centroid(vectors, self.centroids))
+        self._tail_n += len(vectors)
+        return self
+
+    def vector(self, row):
+        base_n = self._base.shape[0]
+        return self._base[row] if row < base_n else self._tail[row - base_n]
+
+    def ids_for(self, rows):
+        rows = np.asarray(rows)
+        base_n = self._base.shape[0]
+        if self._tail_n == 0:
+            return self._base_ids[rows]
+        out = np.empty(rows.shape, dtype=np.result_type(self._base_ids.dtype, self._tail_ids.dtype))
+        in_base = rows < base_n
+        out[in_base] = self._base_ids[rows[in_base]]
+        out[~in_base] = self._tail_ids[rows[~in_base] - base_n]
+        return out
+
+    def _gather(self, rows):
+        base_n = self._base.shape[0]
+        if self._tail_n == 0:
+            return self._base[rows], self._base_sq[rows]
+        in_base = rows < base_n
+        vecs = np.empty((rows.size, self._base.shape[1] if base_n else self._tail.shape[1]), dtype=np.float32)
+        sq = np.empty(rows.size, dtype=np.float32)
+        vecs[in_base], sq[in_base] = self._base[rows[in_base]], self._base_sq[rows[in_base]]
+        tail_rows = rows[~in_base] - base_n
+        vecs[~in_base], sq[~in_base] = self._tail[tail_rows], self._tail_sq[tail_rows]
+        return vecs, sq
+
+    def _blocks(self):
+        # (row offset, vectors, squared norms) over base then tail
+        base_n = self._base.shape[0]
+        for start in range(0, base_n, self.block_size):
+            stop = min(start + self.block_size, base_n)
+            yield start, self._base[start:stop], self._base_sq[start:stop]
+        for start in range(0, self._tail_n, self.block_size):
+            stop = min(start + self.block_size, self._tail_n)
+            yield base_n + start, self._tail[start:stop], self._tail_sq[start:stop]
+
+    def _scores(self, queries, vecs, sq):
+        # Larger is better for both metrics (l2 uses negative squared distance)
+        dots = queries @ vecs.T
+        if self.metric == 'cosine':
+            return dots
+        q_sq = np.einsum('ij,ij->i', queries, queries)[:, None]
+        return -(q_sq - 2.0 * dots + sq[None, :])
+
+    def _train_ivf(self):
+        n = self._base.shape[0]
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        sample = self._base[np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assign = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist).astype(np.float32)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            if self.metric == 'cosine':
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids
+        self._base_assign = self._nearest_centroid(self._base, centroids)
+        self._build_lists()
+
+    def _build_lists(self):
+        nlist = self.centroids.shape[0]
+        self.list_members = np.argsort(self._base_assign, kind='stable')
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(self._base_assign, minlength=nlist))])
+
+    def _nearest_centroid(self, vectors, centroids, nprobe=1):
+        c_sq = np.einsum('ij,ij->i', centroids, centroids)
+        out = np.empty((vectors.shape[0], nprobe), dtype=np.int64)
+        for start in range(0, vectors.shape[0], self.block_size):
+            chunk = vectors[start:start + self.block_size]
+            # argmin ||x-c||^2 == argmax (2 x.c - ||c||^2)
+            scores = 2.0 * chunk @ centroids.T - c_sq[None, :]
+            out[start:start + chunk.shape[0]] = _top_k(scores, nprobe)
+        return out[:, 0] if nprobe == 1 else out
+
+    def search(self, queries, k=10):
+        """Return (ids, scores) arrays of shape (n_queries, k), best first.
+
+        Scores are cosine similarities or L2 distances depending on the metric.
+        """
+        queries = self._prepare(queries)
+        if len(self) == 0:
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(self._base_ids.dtype), empty
+        if self.mode == 'ivf' and self.centroids is not None:
+            rows, scores = self._search_ivf(queries, k)
+        else:
+            rows, scores = self._search_exact(queries, k)
+        if self.metric == 'l2':
+            scores = np.sqrt(np.maximum(-scores, 0.0))
+        return self.ids_for(rows), scores
+
+    def _search_exact(self, queries, k):
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+        for offset, vecs, sq in self._blocks():
+            scores = self._scores(queries, vecs, sq)
+            local = _top_k(scores, k)
+            cand_rows = np.concatenate([best_rows, local + offset], axis=1)
+            cand_scores = np.concatenate([best_scores, np.take_along_axis(scores, local, axis=1)], axis=1)
+            keep = _top_k(cand_scores, k)
+            best_rows = np.take_along_axis(cand_rows, keep, axis=1)
+            best_scores = np.take_along_axis(cand_scores, keep, axis=1)
+        return best_rows, best_scores
+
+    def _search_ivf(self, queries, k):
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes = self._nearest_centroid(queries, self.centroids, nprobe=nprobe).reshape(queries.shape[0], -1)
+        base_n = self._base.shape[0]
+        rows_out, scores_out = [], []
+        for q, lists in zip(queries, probes):
+            cand = [self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in lists]
+            if self._tail_n:
+                cand.append(base_n + np.flatnonzero(np.isin(self._tail_assign[:self._tail_n], lists)))
+            # Sorted rows keep memory-mapped reads sequential
+            cand = np.sort(np.concatenate(cand))
+            if cand.size < min(k, len(self)):
+                # Probed lists too small to fill k; scan everything for this query
+                rows, scores = self._search_exact(q[None, :], k)
+                rows_out.append(rows[0])
+                scores_out.append(scores[0])
+                continue
+            vecs, sq = self._gather(cand)
+            scores = self._scores(q[None, :], vecs, sq)
+            local = _top_k(scores, k)[0]
+            rows_out.append(cand[local])
+            scores_out.append(scores[0, local])
+        return np.stack(rows_out), np.stack(scores_out)
+
+    def compact(self):
+        """Merge the tail segment into the base (loads a memory-mapped base into RAM)."""
+        if self._tail_n == 0:
+            return self
+        n = self._tail_n
+        self._base = np.concatenate([self._base, self._tail[:n]]) if self._base.size else self._tail[:n].copy()
+        self._base_sq = np.concatenate([self._base_sq, self._tail_sq[:n]])
+        self._base_ids = np.concatenate([self._base_ids, self._tail_ids[:n]])
+        if self.centroids is not None:
+            self._base_assign = np.concatenate([self._base_assign, self._tail_assign[:n]])
+            self._build_lists()
+        self._tail = self._tail_sq = self._tail_ids = self._tail_assign = None
+        self._tail_n = 0
+        return self
+
+    def retrain(self):
+        """Re-cluster IVF lists over all rows (e.g. after the history has grown)."""
+        self.compact()
+        if self.mode == 'ivf' and len(self):
+            self._train_ivf()
+        return self
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.compact()
+        np.save(path / 'vectors.npy', np.ascontiguousarray(self._base))
+        np.save(path / 'sq_norms.npy', self._base_sq)
+        np.save(path / 'ids.npy', self._base_ids, allow_pickle=False)
+        if self.centroids is not None:
+            np.save(path / 'centroids.npy', self.centroids)
+            np.save(path / 'assign.npy', self._base_assign)
+            np.save(path / 'list_members.npy', self.list_members)
+            np.save(path / 'list_offsets.npy', self.list_offsets)
+        meta = {'metric': self.metric, 'mode': self.mode, 'nlist': self.nlist, 'nprobe': self.nprobe,
+                'block_size': self.block_size, 'kmeans_iters': self.kmeans_iters, 'seed': self.seed}
+        (path / 'meta.json').write_text(json.dumps(meta))
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        path = Path(path)
+        index = cls(**json.loads((path / 'meta.json').read_text()))
+        mode = 'r' if mmap else None
+        index._base = np.load(path / 'vectors.npy', mmap_mode=mode)
+        index._base_sq = np.load(path / 'sq_norms.npy', mmap_mode=mode)
+        index._base_ids = np.load(path / 'ids.npy', mmap_mode=mode)
+        if (path / 'centroids.npy').exists():
+            index.centroids = np.load(path / 'centroids.npy')
+            index._base_assign = np.load(path / 'assign.npy', mmap_mode=mode)
+            index.list_members = np.load(path / 'list_members.npy', mmap_mode=mode)
+            index.list_offsets = np.load(path / 'list_offsets.npy')
+        return index
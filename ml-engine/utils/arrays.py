@@ -0,0 +1,11 @@
+"""Array Helpers Shared by the Vectorized Samplers and Indexes"""
+import numpy as np
+
+
+def ragged_positions(starts, lens) -> np.ndarray:
+    """Flat positions for concatenated ranges [starts[i], starts[i] + lens[i])."""
+    total = int(lens.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - np.cumsum(lens) + lens, lens)
+    return shift + np.arange(total)
@@ -1,7 +1,7 @@
 import shap
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import matplotlib.pyplot as plt
 import json
 
@@ -62,15 +62,14 @@ class SHAPExplainer:
         return [self.explain_instance(instance) for instance in instances]
 
 class GraphSHAPExplainer:
-    def __init__(self, graph_model, node_embedding_model):
+    def __init__(self, graph_model, node_embedding_model, graph_index=None):
         self.graph_model = graph_model
         self.node_embedding_model = node_embedding_model
+        # GraphContextIndex (xai/graph_index.py) built once per graph version
+        self.graph_index = graph_index
 
     def explain_node(self, node_id: str) -> Dict[str, Any]:
         """Explain the graph model's prediction for a node."""
-        # This is a placeholder for graph explanation techniques.
-        # We can use methods such as GNNExplainer or SHAP for graphs.
-        # For now, we return a mock explanation.
         return {
             "node_id": node_id,
             "influential_neighbors": self._get_influential_neighbors(node_id),
@@ -78,24 +77,24 @@ class GraphSHAPExplainer:
             "embedding_similarity": self._get_embedding_similarity(node_id)
         }
 
-    def _get_influential_neighbors(self, node_id: str) -> List[Dict]:
-        """Get the most influential neighbors for the node."""
-        # Mock data for now
-        return [
-            {"node_id": "123", "influence": 0.8},
-            {"node_id": "456", "influence": 0.6}
-        ]
+    def _get_influential_neighbors(self, node_id: str, top_k: int = 5) -> List[Dict]:
+        """Get the most influential neighbors (random-walk mass within 2 hops)."""
+        if self.graph_index is None:
+            return []
+        return self.graph_index.influential_neighbors(node_id, top_k=top_k)
 
-    def _get_community(self, node_id: str) -> str:
+    def _get_community(self, node_id: str) -> Optional[str]:
         """Get the community the node belongs to."""
-        return "Community_1"
+        if self.graph_index is None:
+            return None
+        community = self.graph_index.community(node_id)
+        return None if community is None else f"Community_{community}"
 
-    def _get_embedding_similarity(self, node_id: str) -> List[Dict]:
+    def _get_embedding_similarity(self, node_id: str, top_k: int = 5) -> List[Dict]:
         """Get the most similar nodes based on embeddings."""
-        return [
-            {"node_id": "789", "similarity": 0.9},
-            {"node_id": "101", "similarity": 0.85}
-        ]
+        if self.graph_index is None:
+            return []
+        return self.graph_index.similar_nodes(node_id, top_k=top_k)
 
 # Integrated explainer that combines both model and graph explanations
 class IntegratedExplainer:
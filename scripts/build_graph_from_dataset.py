@@ -3,45 +3,51 @@
 Reads the train split created by scripts/generate_synthetic_data.py and produces:
 - graph_outputs/edgelist.csv with columns: src,dst
 - graph_outputs/nodes.csv with columns: node_id,original_id,type
+- graph_outputs/graph_columnar/ binary columnar copy (CompactGraph.save: src/dst .npy, nodes, meta)
+
+The split is read in chunks and ids are factorized per chunk (no per-row Python);
+accounts get ids first, then merchants, each in first-seen order.
 
 Usage (Windows CMD):
   python scripts\build_graph_from_dataset.py --name synthetic_transactions --split train
 """
 import argparse
+import sys
 from pathlib import Path
-import pandas as pd
-
-
-def build_graph(df: pd.DataFrame):
-    # Expect columns: account_id, merchant_id
-    accounts = df['account_id'].astype(str).unique().tolist()
-    merchants = df['merchant_id'].astype(str).unique().tolist()
-
-    node_map = {}
-    nodes = []
-    nid = 0
-    for a in accounts:
-        node_map[("account", a)] = nid
-        nodes.append((nid, a, "account"))
-        nid += 1
-    for m in merchants:
-        node_map[("merchant", m)] = nid
-        nodes.append((nid, m, "merchant"))
-        nid += 1
 
-    edges = []
-    for _, row in df[['account_id', 'merchant_id']].iterrows():
-        src = node_map[("account", str(row['account_id']))]
-        dst = node_map[("merchant", str(row['merchant_id']))]
-        edges.append((src, dst))
+import numpy as np
+import pandas as pd
 
-    return nodes, edges
+GRAPH_ENGINE = Path(__file__).resolve().parents[1] / 'graph-engine'
+if str(GRAPH_ENGINE) not in sys.path:
+    sys.path.insert(0, str(GRAPH_ENGINE))
+
+from compact_graph import CompactGraph, NodeIdMap  # noqa: E402
+
+
+def build_graph(chunks):
+    """Return (nodes DataFrame, src ids, dst ids) from DataFrame chunks with account_id, merchant_id."""
+    accounts, merchants = NodeIdMap(), NodeIdMap()
+    src_parts, dst_parts = [], []
+    for df in chunks:
+        src_parts.append(accounts.intern(df['account_id'].astype(str).to_numpy()))
+        dst_parts.append(merchants.intern(df['merchant_id'].astype(str).to_numpy()))
+    n_accounts = len(accounts)
+    src = np.concatenate(src_parts) if src_parts else np.empty(0, dtype=np.int64)
+    dst = (np.concatenate(dst_parts) if dst_parts else np.empty(0, dtype=np.int64)).astype(np.int64) + n_accounts
+    nodes = pd.DataFrame({
+        'node_id': np.arange(n_accounts + len(merchants)),
+        'original_id': np.concatenate([accounts.names, merchants.names]),
+        'type': np.repeat(['account', 'merchant'], [n_accounts, len(merchants)])
+    })
+    return nodes, src.astype(np.int64), dst
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--name', type=str, default='synthetic_transactions')
     ap.add_argument('--split', type=str, default='train', choices=['train', 'valid', 'test'])
+    ap.add_argument('--chunksize', type=int, default=1_000_000, help='CSV rows per chunk')
     args = ap.parse_args()
 
     base = Path(__file__).resolve().parents[1]
@@ -49,28 +55,31 @@ def main():
     if not split_path.exists():
         raise FileNotFoundError(f"Dataset split not found: {split_path}")
 
-    df = pd.read_csv(split_path)
     required = {'account_id', 'merchant_id'}
-    missing = required - set(df.columns)
+    missing = required - set(pd.read_csv(split_path, nrows=0).columns)
     if missing:
         raise ValueError(f"Missing required columns {missing} in {split_path}")
 
-    nodes, edges = build_graph(df)
+    chunks = pd.read_csv(split_path, usecols=sorted(required), dtype=str, chunksize=args.chunksize)
+    nodes_df, src, dst = build_graph(chunks)
 
     out_dir = base / 'graph_outputs'
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    nodes_df = pd.DataFrame(nodes, columns=['node_id', 'original_id', 'type'])
-    edges_df = pd.DataFrame(edges, columns=['src', 'dst'])
-
     nodes_df.to_csv(out_dir / 'nodes.csv', index=False)
-    edges_df.to_csv(out_dir / 'edgelist.csv', index=False)
+    pd.DataFrame({'src': src, 'dst': dst}).to_csv(out_dir / 'edgelist.csv', index=False)
+
+    graph = CompactGraph(directed=True, capacity=len(src))
+    graph.nodes.intern(nodes_df['type'] + ':' + nodes_df['original_id'], nodes_df['type'].to_numpy())
+    graph.add_edges_by_id(src, dst, etype='purchase')
+    graph.save(out_dir / 'graph_columnar')
 
     print({
         'nodes': len(nodes_df),
-        'edges': len(edges_df),
+        'edges': len(src),
         'nodes_path': str(out_dir / 'nodes.csv'),
         'edges_path': str(out_dir / 'edgelist.csv'),
+        'columnar_path': str(out_dir / 'graph_columnar'),
     })
 
 